@@ -0,0 +1,427 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "nyc_sidewalk_benchmarks")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+DEFAULT_SIZES = ["100k", "1M", "10M"]
+
+RAW_CSV_NAME = "Sidewalk_Management_Database-Lot_Info_synthetic.csv"
+GENERATE_CHUNK_ROWS = 1_000_000
+
+# Bounding box of the five boroughs and a grid dense enough to give about as
+# many ZIP polygons as the real boundary file (~260)
+NYC_BOUNDS = (-74.2558, 40.4958, -73.7000, 40.9152)
+GRID_SHAPE = (16, 17)
+# Edge vertex spacing in degrees; ~45 vertices per polygon like the real file
+VERTEX_SPACING = 0.0025
+
+# Dirty ZIP string formats seen in the lot info export, with their shares
+ZIP_FORMATS = [
+    ("{zip}", 0.70),
+    ("{zip}-1234", 0.08),
+    ("NY {zip}", 0.05),
+    (" {zip} ", 0.03),
+    ("{zip}.0", 0.02),
+    ("N/A", 0.05),
+    ("00000", 0.02),
+    ("", 0.05),
+]
+
+# Stages in pipeline order; each reads the outputs of the ones before it
+STAGES = ["data_cleaning", "geo_integration", "simplify_geometries", "load_data", "map"]
+
+
+def parse_size(size):
+    """Parse row counts like '100k', '1M' or '2500000'."""
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    size = size.strip().lower()
+    if size[-1] in multipliers:
+        return int(float(size[:-1]) * multipliers[size[-1]])
+    return int(size)
+
+
+def synthetic_boundaries(seed=0):
+    """
+    Build a grid of wiggly ZIP code polygons covering NYC.
+
+    The plane is warped with a smooth displacement before the cells are cut,
+    so neighbouring polygons still share their borders exactly but those
+    borders have realistic vertex counts that simplification can work on.
+    """
+    import geopandas as gpd
+    import shapely
+
+    minx, miny, maxx, maxy = NYC_BOUNDS
+    nx, ny = GRID_SHAPE
+    xs = np.linspace(minx, maxx, nx + 1)
+    ys = np.linspace(miny, maxy, ny + 1)
+    cells = [
+        shapely.box(xs[i], ys[j], xs[i + 1], ys[j + 1])
+        for i in range(nx)
+        for j in range(ny)
+    ]
+    cells = shapely.segmentize(cells, VERTEX_SPACING)
+
+    rng = np.random.default_rng(seed)
+    phases = rng.uniform(0, 2 * np.pi, 4)
+
+    def warp(coords):
+        x, y = coords[:, 0], coords[:, 1]
+        dx = 0.002 * np.sin(900 * y + phases[0]) + 0.0005 * np.sin(4000 * y + phases[1])
+        dy = 0.002 * np.sin(900 * x + phases[2]) + 0.0005 * np.sin(4000 * x + phases[3])
+        return np.column_stack([x + dx, y + dy])
+
+    geometries = shapely.transform(cells, warp)
+    zipcodes = [f"{10001 + i:05d}" for i in range(len(geometries))]
+    boundaries = gpd.GeoDataFrame(
+        {
+            "OBJECTID": np.arange(1, len(geometries) + 1),
+            "postalCode": zipcodes,
+            "PO_NAME": "Synthetic",
+            "borough": rng.choice(
+                ["Manhattan", "Bronx", "Brooklyn", "Queens", "Staten Island"],
+                len(geometries),
+            ),
+        },
+        geometry=geometries,
+        crs="EPSG:4326",
+    )
+    boundaries["Shape_Area"] = boundaries.to_crs("EPSG:2263").area
+    return boundaries
+
+
+def write_synthetic_lots(path, rows, zipcodes, seed=0):
+    """
+    Write a synthetic lot info CSV with a realistic mix of dirty ZIP strings.
+
+    ZIP codes follow a skewed distribution so some areas have many more
+    inspections than others. Rows are written in chunks to bound memory.
+    """
+    rng = np.random.default_rng(seed)
+    weights = 1 / np.arange(1, len(zipcodes) + 1) ** 0.8
+    weights = rng.permutation(weights / weights.sum())
+    templates = [template for template, _ in ZIP_FORMATS]
+    shares = np.array([share for _, share in ZIP_FORMATS])
+
+    written = 0
+    with open(path, "w", newline="") as f:
+        while written < rows:
+            n = min(GENERATE_CHUNK_ROWS, rows - written)
+            zips = rng.choice(zipcodes, size=n, p=weights)
+            formats = rng.choice(len(templates), size=n, p=shares / shares.sum())
+            zip_strings = np.empty(n, dtype=object)
+            for i, template in enumerate(templates):
+                mask = formats == i
+                zip_strings[mask] = [template.format(zip=z) for z in zips[mask]]
+
+            boro = rng.integers(1, 6, n)
+            block = rng.integers(1, 16_000, n)
+            lot = rng.integers(1, 200, n)
+            chunk = pd.DataFrame(
+                {
+                    "Borough, Block and Lot (BBL) ID": boro * 10**9
+                    + block * 10**4
+                    + lot,
+                    "Borough": boro,
+                    "Block": block,
+                    "Lot": lot,
+                    "ZIP Code": zip_strings,
+                }
+            )
+            chunk.to_csv(f, index=False, header=written == 0)
+            written += n
+
+
+def prepare_inputs(data_dir, rows):
+    """
+    Generate (or reuse) the synthetic inputs for one dataset size.
+
+    Inputs are cached under `data_dir/<rows>/input` since the 10M-row CSV
+    takes a while to write.
+    """
+    input_dir = os.path.join(data_dir, str(rows), "input")
+    csv_path = os.path.join(input_dir, RAW_CSV_NAME)
+    boundaries_path = os.path.join(input_dir, "nyc_zipcodes.geojson")
+    if os.path.exists(csv_path) and os.path.exists(boundaries_path):
+        return csv_path, boundaries_path
+
+    os.makedirs(input_dir, exist_ok=True)
+    print(f"Generating synthetic inputs with {rows} rows in '{input_dir}'...")
+    boundaries = synthetic_boundaries()
+    boundaries.to_file(boundaries_path, driver="GeoJSON")
+    write_synthetic_lots(csv_path + ".tmp", rows, boundaries["postalCode"].to_numpy())
+    os.replace(csv_path + ".tmp", csv_path)
+    return csv_path, boundaries_path
+
+
+def prepare_workdir(data_dir, rows, csv_path, boundaries_path):
+    """
+    Lay out a fresh working directory the way the pipeline expects it.
+
+    The pipeline scripts use paths relative to the repository root, so every
+    run gets its own `data/` tree with the synthetic inputs in place.
+    """
+    workdir = os.path.join(data_dir, str(rows), "run")
+    shutil.rmtree(workdir, ignore_errors=True)
+    os.makedirs(os.path.join(workdir, "data", "geo"))
+    os.symlink(os.path.abspath(csv_path), os.path.join(workdir, "data", RAW_CSV_NAME))
+    shutil.copy(boundaries_path, os.path.join(workdir, "data", "geo"))
+    return workdir
+
+
+def path_bytes(paths):
+    """Total size of the given files and directories."""
+    total = 0
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+        elif os.path.exists(path):
+            total += os.path.getsize(path)
+    return total
+
+
+def run_data_cleaning(cleaning_args):
+    import data_cleaning
+
+    sys.argv = ["data_cleaning.py", "--input", f"data/{RAW_CSV_NAME}"] + cleaning_args
+    data_cleaning.main()
+    return path_bytes(
+        [
+            data_cleaning.OUTPUT_PATH,
+            data_cleaning.PARQUET_OUTPUT_PATH,
+            data_cleaning.STATE_PATH,
+        ]
+    )
+
+
+def run_geo_integration(cleaning_args):
+    import geo_integration
+
+    geo_integration.integrate_geo_data()
+    return path_bytes(
+        [geo_integration.GEOJSON_OUTPUT_PATH, geo_integration.GEOPARQUET_OUTPUT_PATH]
+    )
+
+
+def run_simplify_geometries(cleaning_args):
+    import simplify_geometries
+
+    simplify_geometries.build_simplified_levels()
+    return path_bytes([simplify_geometries.OUTPUT_DIR])
+
+
+def run_load_data(cleaning_args):
+    import app
+
+    fingerprint = app.data_fingerprint()
+    wellness_df, has_geo, _ = app.load_data(fingerprint)
+    geo_df = app.load_geo_data(fingerprint) if has_geo else None
+    in_memory = wellness_df.memory_usage(deep=True).sum()
+    if geo_df is not None:
+        in_memory += geo_df.memory_usage(deep=True).sum()
+    return int(in_memory)
+
+
+def run_map(cleaning_args):
+    import app
+
+    # The map the dashboard renders on first load: the lowest zoom level
+    fingerprint = app.data_fingerprint()
+    levels = app.load_simplified_levels(fingerprint)
+    zoom = min(level["zoom"] for level in levels["levels"]) if levels else 10
+    return len(app.build_map_html(fingerprint, zoom).encode())
+
+
+STAGE_FUNCTIONS = {
+    "data_cleaning": run_data_cleaning,
+    "geo_integration": run_geo_integration,
+    "simplify_geometries": run_simplify_geometries,
+    "load_data": run_load_data,
+    "map": run_map,
+}
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process."""
+    # ru_maxrss survives exec on Linux, so a stage subprocess would report
+    # the benchmark parent's peak; VmHWM is reset for the new program
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_stage(stage, workdir, cleaning_args):
+    """
+    Run one stage in this process and return its measurements.
+
+    Called in a fresh subprocess per stage so the peak RSS belongs to that
+    stage alone. Modules are imported before the clock starts, and the
+    stages' progress output is discarded.
+    """
+    os.chdir(workdir)
+    sys.path.insert(0, os.path.abspath(SRC_DIR))
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        __import__("app" if stage in ("load_data", "map") else stage)
+        import_rss = peak_rss_bytes()
+        start = time.perf_counter()
+        output_bytes = STAGE_FUNCTIONS[stage](cleaning_args)
+        wall = time.perf_counter() - start
+    return {
+        "stage": stage,
+        "wall_seconds": round(wall, 4),
+        "peak_rss_mb": round(peak_rss_bytes() / 2**20, 1),
+        "import_rss_mb": round(import_rss / 2**20, 1),
+        "output_bytes": output_bytes,
+    }
+
+
+def benchmark_size(data_dir, rows, stages, cleaning_args):
+    """Run the selected stages in order against one dataset size."""
+    csv_path, boundaries_path = prepare_inputs(data_dir, rows)
+    workdir = prepare_workdir(data_dir, rows, csv_path, boundaries_path)
+
+    results = []
+    for stage in stages:
+        command = [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--run-stage",
+            stage,
+            "--workdir",
+            workdir,
+            "--cleaning-args",
+            json.dumps(cleaning_args),
+        ]
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(completed.stderr)
+            raise RuntimeError(f"Stage '{stage}' failed for {rows} rows.")
+        result = {"rows": rows, **json.loads(completed.stdout.splitlines()[-1])}
+        print(
+            f"{rows:>10} rows  {stage:<20} {result['wall_seconds']:>9.3f} s  "
+            f"{result['peak_rss_mb']:>8.1f} MB  {result['output_bytes']:>12} B"
+        )
+        results.append(result)
+    return results
+
+
+def compare_to_baseline(results, baseline_path, tolerance):
+    """
+    Report stages that got slower or bigger than in a baseline run.
+
+    Returns the list of regressions; a metric regresses when it exceeds the
+    baseline value times `tolerance`.
+    """
+    with open(baseline_path, "r") as f:
+        baseline = {(r["rows"], r["stage"]): r for r in json.load(f)["results"]}
+
+    regressions = []
+    for result in results:
+        previous = baseline.get((result["rows"], result["stage"]))
+        if previous is None:
+            continue
+        for metric in ["wall_seconds", "peak_rss_mb", "output_bytes"]:
+            if result[metric] > previous[metric] * tolerance:
+                regressions.append(
+                    f"{result['stage']} at {result['rows']} rows: {metric} "
+                    f"{previous[metric]} -> {result[metric]}"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark every pipeline stage on synthetic NYC-scale data."
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help="Lot info row counts to benchmark, e.g. 100k 1M 10M",
+    )
+    parser.add_argument(
+        "--stages", nargs="+", choices=STAGES, default=STAGES, help="Stages to run"
+    )
+    parser.add_argument(
+        "--data-dir",
+        default=DEFAULT_DATA_DIR,
+        help="Where synthetic inputs are generated and cached",
+    )
+    parser.add_argument(
+        "--cleaning-args",
+        default="[]",
+        help="Extra data_cleaning.py arguments as a JSON list, e.g. '[\"--stream\"]'",
+    )
+    parser.add_argument("--output", help="Results JSON (default: benchmarks/results/)")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.25,
+        help="Allowed ratio over the baseline before a metric counts as regressed",
+    )
+    # Internal: run a single stage in this process
+    parser.add_argument("--run-stage", choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    cleaning_args = json.loads(args.cleaning_args)
+    if args.run_stage:
+        print(json.dumps(run_stage(args.run_stage, args.workdir, cleaning_args)))
+        return
+
+    results = []
+    for size in args.sizes:
+        results.extend(
+            benchmark_size(args.data_dir, parse_size(size), args.stages, cleaning_args)
+        )
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "cleaning_args": cleaning_args,
+        "results": results,
+    }
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"benchmark_{stamp}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to '{output}'")
+
+    if args.baseline:
+        regressions = compare_to_baseline(results, args.baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regressions against '{args.baseline}':")
+            for regression in regressions:
+                print(f" - {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions against '{args.baseline}'.")
+
+
+if __name__ == "__main__":
+    main()
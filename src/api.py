@@ -0,0 +1,293 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import shapely
+
+# Tornado is installed with Streamlit, so the API needs no extra dependency
+import tornado.ioloop
+import tornado.web
+
+from geo_integration import WELLNESS_CSV_PATH, WELLNESS_PARQUET_PATH
+from scoring import (
+    DEFAULT_FORMULA,
+    DENOMINATORS_PATH,
+    FORMULAS,
+    load_denominators,
+    score_counts,
+)
+from point_lookup import load_zip_index
+from zip_codes import format_zipcodes
+from zip_schema import ZIPCODES_PATH
+
+# Clear of the dashboard processes, which take 8501 and up
+DEFAULT_PORT = 8600
+
+# Rendered responses kept per data version
+RESPONSE_CACHE_SIZE = 4096
+# How often, at most, the data files are checked for a new version (seconds)
+VERSION_CHECK_INTERVAL = 1.0
+# Largest N accepted by /top and /bottom
+MAX_RANKING_SIZE = 1000
+# Coordinates in /bbox GeoJSON, rounded to about 1 m
+GEOJSON_PRECISION = 5
+
+
+def data_version(paths):
+    """Short hash of the data files' sizes and modification times."""
+    fingerprint = [
+        (path, os.path.getsize(path), os.path.getmtime(path))
+        for path in paths
+        if os.path.exists(path)
+    ]
+    return hashlib.sha1(json.dumps(fingerprint).encode()).hexdigest()[:16]
+
+
+class ScoreData:
+    """
+    One version of the scores and ZIP code polygons, indexed for lookups.
+
+    The polygons' STRtree comes from the point lookup's disk cache, so a
+    point lookup or bounding box query is a single tree query.
+    """
+
+    def __init__(self, zipcodes_path=ZIPCODES_PATH):
+        if os.path.exists(WELLNESS_PARQUET_PATH):
+            self.scores = pd.read_parquet(WELLNESS_PARQUET_PATH)
+        else:
+            self.scores = pd.read_csv(WELLNESS_CSV_PATH, dtype={"zipcode": str})
+        self.denominators = load_denominators(DENOMINATORS_PATH)
+
+        self.index, self.polygon_zips = load_zip_index(zipcodes_path)
+
+        self.tables = {}
+        self.records = {}
+
+    def table(self, formula=DEFAULT_FORMULA):
+        """Scores under a formula, indexed by ZIP code."""
+        if formula not in self.tables:
+            scores = self.scores
+            if formula != DEFAULT_FORMULA:
+                scores = scores.assign(
+                    wellness_score=score_counts(scores, formula, self.denominators)
+                )
+            self.tables[formula] = scores.set_index("zipcode")
+        return self.tables[formula]
+
+    def zip_record(self, zipcode, formula=DEFAULT_FORMULA):
+        """Count and score of one ZIP code, or None."""
+        # Looked up in a plain dict, which is far cheaper per request than
+        # indexing into the frame
+        if formula not in self.records:
+            table = self.table(formula).reset_index()
+            table["wellness_score"] = table["wellness_score"].astype(object)
+            table.loc[table["wellness_score"].isna(), "wellness_score"] = None
+            self.records[formula] = {
+                record["zipcode"]: record
+                for record in table[
+                    ["zipcode", "inspection_count", "wellness_score"]
+                ].to_dict(orient="records")
+            }
+        return self.records[formula].get(zipcode)
+
+    def ranking(self, n, best=True, formula=DEFAULT_FORMULA):
+        """The N highest or lowest scoring ZIP codes, as `zip_record` has them."""
+        table = self.table(formula).dropna(subset=["wellness_score"])
+        ranked = table.sort_values("wellness_score", ascending=not best, kind="stable")
+        return [self.zip_record(zipcode, formula) for zipcode in ranked.index[:n]]
+
+    def locate(self, lon, lat):
+        """ZIP code of the polygon containing a point, or None."""
+        polygon = self.index.assign([lon], [lat])[0]
+        if polygon < 0:
+            return None
+        return format_zipcodes(self.polygon_zips[[polygon]])[0]
+
+    def bbox_geojson(self, min_lon, min_lat, max_lon, max_lat, formula=DEFAULT_FORMULA):
+        """GeoJSON of the ZIP polygons intersecting a bounding box, with scores."""
+        box = shapely.box(min_lon, min_lat, max_lon, max_lat)
+        polygons = np.sort(self.index.tree.query(box, predicate="intersects"))
+        geometries = shapely.set_precision(
+            self.index.geometries[polygons], 10**-GEOJSON_PRECISION
+        )
+        features = []
+        zipcodes = format_zipcodes(self.polygon_zips[polygons])
+        for zipcode, geometry in zip(zipcodes, geometries):
+            record = self.zip_record(zipcode, formula) or {}
+            features.append(
+                {
+                    "type": "Feature",
+                    "properties": {
+                        "zipcode": zipcode,
+                        "inspection_count": record.get("inspection_count"),
+                        "wellness_score": record.get("wellness_score"),
+                    },
+                    "geometry": json.loads(shapely.to_geojson(geometry)),
+                }
+            )
+        return {"type": "FeatureCollection", "features": features}
+
+
+class ScoreService:
+    """
+    Serves JSON responses from the current data version.
+
+    Responses are rendered once per data version and request and kept in an
+    LRU cache; the data is reloaded, and the cache dropped, when the data
+    files change.
+    """
+
+    def __init__(self, zipcodes_path=ZIPCODES_PATH):
+        self.zipcodes_path = zipcodes_path
+        self.paths = [
+            WELLNESS_PARQUET_PATH,
+            WELLNESS_CSV_PATH,
+            DENOMINATORS_PATH,
+            zipcodes_path,
+        ]
+        self.version = None
+        self.checked_at = 0.0
+        self.data = None
+        self.render = lru_cache(maxsize=RESPONSE_CACHE_SIZE)(self._render)
+        self.refresh()
+
+    def refresh(self):
+        """Reload the data if the files changed, checking at most once a second."""
+        now = time.monotonic()
+        if self.data is not None and now - self.checked_at < VERSION_CHECK_INTERVAL:
+            return self.version
+        self.checked_at = now
+        version = data_version(self.paths)
+        if version != self.version:
+            self.data = ScoreData(self.zipcodes_path)
+            self.version = version
+            self.render.cache_clear()
+        return self.version
+
+    def _render(self, version, endpoint, args):
+        """
+        Render one response as (status, JSON bytes).
+
+        `version` only keys the cache; `args` is a sorted tuple of the query
+        arguments, so equivalent requests share an entry.
+        """
+        status, body = self.respond(endpoint, dict(args))
+        return status, json.dumps(body).encode()
+
+    def respond(self, endpoint, params):
+        """Answer one request as (status, JSON-serializable body)."""
+        formula = params.get("formula", DEFAULT_FORMULA)
+        if formula not in FORMULAS:
+            return 400, {"error": f"Unknown formula '{formula}'"}
+
+        try:
+            if endpoint == "zip":
+                record = self.data.zip_record(params["zipcode"], formula)
+                if record is None:
+                    return 404, {"error": f"No score for ZIP code {params['zipcode']}"}
+                return 200, record
+            if endpoint in ("top", "bottom"):
+                n = int(params.get("n", 10))
+                if n < 1:
+                    raise ValueError("n must be positive")
+                n = min(n, MAX_RANKING_SIZE)
+                return 200, self.data.ranking(n, endpoint == "top", formula)
+            if endpoint == "point":
+                lat, lon = float(params["lat"]), float(params["lon"])
+                zipcode = self.data.locate(lon, lat)
+                if zipcode is None:
+                    return 404, {"error": "The point isn't in any ZIP code"}
+                record = self.data.zip_record(zipcode, formula)
+                return 200, record or {"zipcode": zipcode, "wellness_score": None}
+            if endpoint == "bbox":
+                bounds = [float(value) for value in params["bbox"].split(",")]
+                if len(bounds) != 4:
+                    raise ValueError("bbox needs min_lon,min_lat,max_lon,max_lat")
+                return 200, self.data.bbox_geojson(*bounds, formula)
+        except KeyError as error:
+            return 400, {"error": f"Missing parameter {error}"}
+        except ValueError as error:
+            return 400, {"error": str(error)}
+        return 404, {"error": f"Unknown endpoint '{endpoint}'"}
+
+
+class ScoreHandler(tornado.web.RequestHandler):
+    """GET handler for every endpoint, answering from the response cache."""
+
+    def initialize(self, service, endpoint):
+        self.service = service
+        self.endpoint = endpoint
+
+    def compute_etag(self):
+        # Tied to the data version, so clients can revalidate without the
+        # body being rendered or hashed
+        return f'"{self.service.version}"'
+
+    def get(self, zipcode=None):
+        self.service.refresh()
+        self.set_header("Cache-Control", "no-cache")
+        self.set_etag_header()
+        if self.check_etag_header():
+            self.set_status(304)
+            return
+
+        args = {name: self.get_query_argument(name) for name in self.request.arguments}
+        if zipcode is not None:
+            args["zipcode"] = zipcode
+        status, body = self.service.render(
+            self.service.version, self.endpoint, tuple(sorted(args.items()))
+        )
+        self.set_status(status)
+        self.set_header("Content-Type", "application/json")
+        self.finish(body)
+
+
+class VersionHandler(tornado.web.RequestHandler):
+    """Report the current data version."""
+
+    def initialize(self, service):
+        self.service = service
+
+    def get(self):
+        self.write({"version": self.service.refresh()})
+
+
+def make_app(service):
+    """Route the API endpoints to one shared service."""
+    return tornado.web.Application(
+        [
+            (r"/zip/(\d{5})", ScoreHandler, dict(service=service, endpoint="zip")),
+            (r"/top", ScoreHandler, dict(service=service, endpoint="top")),
+            (r"/bottom", ScoreHandler, dict(service=service, endpoint="bottom")),
+            (r"/point", ScoreHandler, dict(service=service, endpoint="point")),
+            (r"/bbox", ScoreHandler, dict(service=service, endpoint="bbox")),
+            (r"/version", VersionHandler, dict(service=service)),
+        ],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve wellness scores and ZIP code geometries as JSON."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--zipcodes", default=ZIPCODES_PATH, help="ZIP code boundary GeoJSON"
+    )
+    args = parser.parse_args()
+
+    print("Loading the scores and building the spatial index...")
+    service = ScoreService(args.zipcodes)
+    make_app(service).listen(args.port, address=args.host)
+    print(f"Serving data version {service.version} on http://{args.host}:{args.port}")
+    tornado.ioloop.IOLoop.current().start()
+
+
+if __name__ == "__main__":
+    main()
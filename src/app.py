@@ -1,12 +1,56 @@
 import streamlit as st
 import pandas as pd
-import folium
-from streamlit_folium import st_folium
-import plotly.express as px
+import streamlit.components.v1 as components
 import os
+import glob
 import json
-import numpy as np
-from branca.colormap import LinearColormap
+from contextlib import nullcontext
+from color_scale import (
+    SCORE_BINS,
+    SCORE_COLORS,
+    class_ranges,
+    score_cell_styles,
+    score_colors,
+)
+from rollups import (
+    ROLLUPS_PATH,
+    build_rollups,
+    geography_from_rollups,
+    load_rollups,
+    zip_geography,
+)
+from scoring import (
+    DEFAULT_FORMULA,
+    DENOMINATORS_PATH,
+    FORMULAS,
+    available_formulas,
+    load_denominators,
+    score_counts,
+)
+from instrumentation import REPORT_PATH, load_report, recording, stage
+from shared_data import (
+    GEO_ARTIFACT,
+    GEO_SOURCES,
+    SCORES_ARTIFACT,
+    SCORES_SOURCES,
+    artifact_is_current,
+    map_frame,
+)
+from snapshot_store import STORE_DIR, ZIP_INDEX_FILE, list_snapshots, zip_history
+from sketches import ScoreSketch
+from summary import (
+    SUMMARY_PATH,
+    build_summary,
+    load_summary,
+    sketch_histogram,
+    sketch_stats,
+)
+from table_index import TableIndex
+from zip_codes import format_zipcodes
+from zip_schema import cached_zipcode_field
+
+# folium, branca, plotly and geopandas are imported where they are first
+# needed, so the title and metrics paint before those imports are paid for
 
 # Set page configuration
 st.set_page_config(
@@ -55,62 +99,443 @@ st.markdown(
 
 
 # Function to load data
+def load_data(fingerprint=None):
+    """Load the wellness score data and find the geospatial data if available
+
+    Only the ZIP field of the geospatial data is looked up here; its
+    geometries are loaded by `load_geo_data` when the map needs them.
+    `fingerprint` only keys the caches, so new pipeline outputs are picked up.
+    """
+    if artifact_is_current(SCORES_ARTIFACT, SCORES_SOURCES):
+        wellness_df = map_shared_data(SCORES_ARTIFACT, fingerprint)
+    else:
+        wellness_df = read_scores(fingerprint)
+    return (wellness_df,) + load_geo_info(fingerprint)
+
+
+@st.cache_resource(max_entries=2)
+def map_shared_data(path, fingerprint=None):
+    """Memory-map a shared artifact published by the pipeline
+
+    Cached as a resource, so every session gets the same read-only frame
+    rather than a copy, and every process maps the same page-cache pages.
+    """
+    with stage("map_shared_data"):
+        return map_frame(path)
+
+
 @st.cache_data
-def load_data():
-    """Load the wellness score data and geospatial data if available"""
-    wellness_df = pd.read_csv("data/wellness_scores.csv")
+def read_scores(fingerprint=None):
+    """Read the wellness scores from the pipeline outputs"""
+    # Prefer the typed Parquet outputs of the pipeline over the text formats
+    with stage("read_scores"):
+        if os.path.exists("data/wellness_scores.parquet"):
+            return pd.read_parquet("data/wellness_scores.parquet")
+        return pd.read_csv("data/wellness_scores.csv", dtype={"zipcode": str})
 
-    # Check if geospatial data exists
-    geo_path = "data/geo/nyc_wellness_scores.geojson"
-    if os.path.exists(geo_path):
-        import geopandas as gpd
 
-        geo_df = gpd.read_file(geo_path)
+@st.cache_data
+def load_geo_info(fingerprint=None):
+    """Whether geospatial data is available, and its ZIP field"""
+    geo_path = geo_data_path()
+    if geo_path:
         has_geo = True
 
-        # Check the actual properties in the GeoJSON
-        property_fields = list(geo_df.columns)
-        zipcode_field = None
-        for field in property_fields:
-            if field.lower() in [
-                "postalcode",
-                "zipcode",
-                "zip",
-                "postal_code",
-                "zip_code",
-            ]:
-                zipcode_field = field
-                break
+        # Use the ZIP field recorded by geo_integration, falling back to a
+        # name check for outputs written before the schema manifest existed
+        zipcode_field = cached_zipcode_field(geo_path)
+        if zipcode_field is None:
+            if geo_path.endswith(".parquet"):
+                import pyarrow.parquet as pq
+
+                columns = pq.read_schema(geo_path).names
+            else:
+                columns = load_geo_data(fingerprint).columns
+            zipcode_field = next(
+                (
+                    field
+                    for field in columns
+                    if field.lower()
+                    in ["postalcode", "zipcode", "zip", "postal_code", "zip_code"]
+                ),
+                None,
+            )
     else:
-        geo_df = None
         has_geo = False
         zipcode_field = None
 
-    return wellness_df, geo_df, has_geo, zipcode_field
-
-
-# Custom function to get color based on wellness score
-def get_color(score):
-    if score is None:
-        return "#CCCCCC"  # Gray for missing data
-    elif score >= 90:
-        return "#006400"  # Dark green
-    elif score >= 75:
-        return "#228B22"  # Forest green
-    elif score >= 60:
-        return "#32CD32"  # Lime green
-    elif score >= 45:
-        return "#ADFF2F"  # Green yellow
-    elif score >= 30:
-        return "#FFFF00"  # Yellow
-    elif score >= 15:
-        return "#FFA500"  # Orange
+    return has_geo, zipcode_field
+
+
+def geo_data_path():
+    """Path of the merged geospatial data, preferring GeoParquet, or None"""
+    for path in [
+        "data/geo/nyc_wellness_scores.parquet",
+        "data/geo/nyc_wellness_scores.geojson",
+    ]:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_geo_data(fingerprint=None):
+    """Load the merged geospatial data, from the shared artifact if current"""
+    if artifact_is_current(GEO_ARTIFACT, GEO_SOURCES):
+        return map_shared_data(GEO_ARTIFACT, fingerprint)
+    return read_geo_data(fingerprint)
+
+
+@st.cache_data
+def read_geo_data(fingerprint=None):
+    """Read the merged geospatial data"""
+    import geopandas as gpd
+
+    from geojson_io import read_geojson
+
+    geo_path = geo_data_path()
+    if geo_path.endswith(".parquet"):
+        return gpd.read_parquet(geo_path)
+    return read_geojson(geo_path)
+
+
+@st.cache_data
+def load_scoring_denominators(fingerprint=None):
+    """Load the per-ZIP areas and lot counts, if they have been computed"""
+    return load_denominators()
+
+
+def score_table(fingerprint=None, formula=DEFAULT_FORMULA):
+    """The wellness scores under a scoring formula
+
+    The stored scores already use the default formula and are returned as
+    loaded; other formulas are recomputed from the counts, so switching
+    never reruns ingestion.
+    """
+    if formula == DEFAULT_FORMULA:
+        return load_data(fingerprint)[0]
+    return rescore_table(fingerprint, formula)
+
+
+@st.cache_data
+def rescore_table(fingerprint=None, formula=DEFAULT_FORMULA):
+    """The wellness scores recomputed under another scoring formula"""
+    wellness_df = load_data(fingerprint)[0]
+    scores = score_counts(wellness_df, formula, load_scoring_denominators(fingerprint))
+    return wellness_df.assign(wellness_score=scores)
+
+
+@st.cache_data
+def load_score_summary(fingerprint=None, formula=DEFAULT_FORMULA):
+    """Load the precomputed metrics, rankings and histogram of the scores
+
+    Falls back to computing them when the summary is missing or older than
+    the scores, or when another scoring formula is selected.
+    """
+    if formula != DEFAULT_FORMULA:
+        return build_summary(score_table(fingerprint, formula))
+    if is_newer_than_scores(SUMMARY_PATH):
+        summary = load_summary(SUMMARY_PATH)
+        # Summaries written before scores were sketched are rebuilt
+        if "sketch" in summary:
+            return summary
+    return build_summary(load_data(fingerprint)[0])
+
+
+def is_newer_than_scores(path):
+    """Whether a precomputed file exists and is at least as new as the scores"""
+    scores_path = next(
+        path
+        for path in ["data/wellness_scores.parquet", "data/wellness_scores.csv"]
+        if os.path.exists(path)
+    )
+    return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(
+        scores_path
+    )
+
+
+@st.cache_resource(max_entries=4)
+def load_rollup_cube(fingerprint=None, formula=DEFAULT_FORMULA):
+    """Load the precomputed city, borough, neighborhood and ZIP code rollups
+
+    The cube is one read-only object shared by every session, so drilling
+    down only looks nodes up by id. It is rebuilt from the scores under
+    another scoring formula or when it is older than the scores. Returns
+    None when there is no boundary data to place the ZIP codes with.
+    """
+    stored = load_rollups(ROLLUPS_PATH) if os.path.exists(ROLLUPS_PATH) else None
+    if (
+        formula == DEFAULT_FORMULA
+        and stored
+        and is_newer_than_scores(ROLLUPS_PATH)
+        and "sketch" in stored["nodes"][stored["root"]]
+    ):
+        return stored
+    if stored:
+        geography = geography_from_rollups(stored)
+    elif load_data(fingerprint)[1]:
+        geography = zip_geography(load_geo_data(fingerprint))
     else:
-        return "#FF0000"  # Red
+        return None
+    return build_rollups(score_table(fingerprint, formula), geography)
+
+
+# Function to load the precomputed simplified map geometries
+@st.cache_data
+def load_simplified_levels(fingerprint=None, resolution="zip"):
+    """Load the manifest of simplified TopoJSON levels, if they have been built"""
+    manifest_path = os.path.join(simplified_dir(resolution), "levels.json")
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "r") as f:
+        return json.load(f)
+
+
+@st.cache_data
+def load_topojson(file_name, fingerprint=None, resolution="zip"):
+    """Load one simplified TopoJSON level"""
+    with open(os.path.join(simplified_dir(resolution), file_name), "r") as f:
+        return json.load(f)
+
+
+def simplified_dir(resolution):
+    """Directory of the simplified levels for a map resolution"""
+    if resolution == "zip":
+        return "data/geo/simplified"
+    return os.path.join("data/geo/simplified", resolution)
+
+
+def sub_zip_resolutions():
+    """Sub-ZIP map resolutions that have simplified levels built"""
+    return sorted(
+        os.path.basename(os.path.dirname(path))
+        for path in glob.glob("data/geo/simplified/*/levels.json")
+    )
+
+
+def pick_level(levels, zoom):
+    """Pick the smallest simplified level that is detailed enough for the zoom"""
+    levels = sorted(levels, key=lambda level: level["zoom"])
+    for level in levels:
+        if level["zoom"] >= zoom:
+            return level
+    return levels[-1]
+
+
+# Data files the dashboard is built from
+DATA_FILES = [
+    "data/wellness_scores.parquet",
+    "data/wellness_scores.csv",
+    "data/geo/nyc_wellness_scores.parquet",
+    "data/geo/nyc_wellness_scores.geojson",
+    "data/geo/simplified/levels.json",
+    SUMMARY_PATH,
+    ROLLUPS_PATH,
+    DENOMINATORS_PATH,
+    os.path.join(STORE_DIR, ZIP_INDEX_FILE),
+    SCORES_ARTIFACT,
+    GEO_ARTIFACT,
+]
+
+
+def data_fingerprint():
+    """Fingerprint the data files by size and modification time"""
+    paths = DATA_FILES + sorted(glob.glob("data/geo/simplified/*/levels.json"))
+    return tuple(
+        (path, os.path.getsize(path), os.path.getmtime(path))
+        for path in paths
+        if os.path.exists(path)
+    )
+
+
+# Function to build the choropleth map
+@st.cache_data(show_spinner=False)
+def build_map_html(fingerprint, zoom, resolution="zip", formula=DEFAULT_FORMULA):
+    """Build the wellness score map and return it as rendered HTML
+
+    Cached on the data fingerprint, zoom level, resolution and scoring formula,
+    so widget interactions anywhere in the dashboard don't rebuild the map.
+    The formula only applies to ZIP codes; sub-ZIP maps keep their own scores.
+    ZIP code maps always show the current scores, whatever the scores baked
+    into the simplified levels, which only the pipeline rebuilds.
+    """
+    # Imported here so sessions only pay for folium once a map is drawn
+    import folium
+    from branca.colormap import StepColormap
+
+    wellness_df, has_geo, zipcode_field = load_data(fingerprint)
+    simplified = load_simplified_levels(fingerprint, resolution)
+
+    # Current scores of the selected formula by ZIP code, replacing the
+    # stored ones, which are as of the last time the levels were built
+    rescored = None
+    if resolution == "zip":
+        scores = score_table(fingerprint, formula)
+        rescored = pd.DataFrame(
+            {
+                "wellness_score": scores["wellness_score"].to_numpy(),
+                "inspection_count": scores["inspection_count"].to_numpy(),
+            },
+            index=scores["zipcode"].to_numpy(),
+        )
+
+    # Create a folium map centered on NYC; sub-ZIP resolutions have tens of
+    # thousands of polygons, which draw much faster on a canvas than as SVG
+    m = folium.Map(
+        location=[40.7128, -74.0060],
+        zoom_start=zoom,
+        tiles="CartoDB positron",
+        prefer_canvas=resolution != "zip",
+    )
+
+    # Create a stepped colormap from red to green matching the score classes
+    custom_cm = StepColormap(
+        SCORE_COLORS,
+        index=[0] + SCORE_BINS + [100],
+        vmin=0,
+        vmax=100,
+        caption="Wellness Score (%)",
+    )
+
+    # Every feature uses the same outline; only the fill colour varies
+    def style_function(feature):
+        return {
+            "fillColor": feature["properties"]["fillColor"],
+            "color": "#000000",
+            "weight": 1,
+            "fillOpacity": 0.7,
+        }
+
+    # Add tooltips to show information when hovering over a ZIP code
+    label = simplified["label"] if simplified else "ZIP Code"
+    tooltip_aliases = [f"{label}:", "Wellness Score (%):", "Inspection Count:"]
+    tooltip_style = """
+            background-color: #F0F0F0;
+            border: 2px solid black;
+            border-radius: 3px;
+            box-shadow: 3px;
+        """
+
+    if simplified:
+        level = pick_level(simplified["levels"], zoom)
+        names = simplified["properties"]
+
+        # Colour all features in one pass before folium serializes them
+        with stage("load_topojson"):
+            topology = load_topojson(level["file"], fingerprint, resolution)
+        geometries = topology["objects"][simplified["object"]]["geometries"]
+        if rescored is not None:
+            current = rescored.reindex(
+                [g["properties"].get(names["key"]) for g in geometries]
+            )
+            for geometry, score, count in zip(
+                geometries,
+                current["wellness_score"].round(2),
+                current["inspection_count"],
+            ):
+                properties = geometry["properties"]
+                properties[names["wellness_score"]] = (
+                    None if pd.isna(score) else float(score)
+                )
+                properties[names["inspection_count"]] = (
+                    None if pd.isna(count) else int(count)
+                )
+        colors = score_colors(
+            [g["properties"].get(names["wellness_score"]) for g in geometries]
+        )
+        for geometry, color in zip(geometries, colors):
+            geometry["properties"]["fillColor"] = color
+
+        # Add TopoJSON layer with custom styling
+        layer = folium.TopoJson(
+            topology,
+            f"objects.{simplified['object']}",
+            style_function=style_function,
+            name="Wellness Scores",
+        )
+        tooltip_fields = [
+            names["key"],
+            names["wellness_score"],
+            names["inspection_count"],
+        ]
+    else:
+        # Colour all features in one pass before folium serializes them
+        with stage("load_geo_data"):
+            geo_df = load_geo_data(fingerprint)
+        if rescored is not None:
+            current = rescored.reindex(geo_df["zipcode"]).set_index(geo_df.index)
+            geo_df = geo_df.assign(
+                wellness_score=current["wellness_score"],
+                inspection_count=current["inspection_count"],
+            )
+        geo_df = geo_df.assign(fillColor=score_colors(geo_df["wellness_score"]))
+
+        # Add GeoJSON layer with custom styling
+        layer = folium.GeoJson(
+            data=geo_df, style_function=style_function, name="Wellness Scores"
+        )
+        tooltip_fields = [zipcode_field, "wellness_score", "inspection_count"]
+
+    tooltip = folium.GeoJsonTooltip(
+        fields=tooltip_fields,
+        aliases=tooltip_aliases,
+        localize=True,
+        sticky=False,
+        labels=True,
+        style=tooltip_style,
+    )
+    tooltip.add_to(layer)
+    layer.add_to(m)
+
+    # Add a legend
+    custom_cm.add_to(m)
+
+    # Folium serializes every feature to HTML here
+    with stage("render_html"):
+        return m.get_root().render()
+
+
+# Data Table sort options, as (sort column, descending) for the table index
+SORT_ORDERS = {
+    "ZIP Code (Ascending)": ("key", False),
+    "ZIP Code (Descending)": ("key", True),
+    "Wellness Score (Highest First)": ("value", True),
+    "Wellness Score (Lowest First)": ("value", False),
+}
+PAGE_SIZES = [25, 50, 100, 500]
+
+
+@st.cache_resource
+def load_table_index(fingerprint=None, formula=DEFAULT_FORMULA):
+    """Build the Data Table's search and sort index once per data version"""
+    return TableIndex(score_table(fingerprint, formula))
+
+
+@st.cache_data(show_spinner=False)
+def table_csv(
+    fingerprint,
+    formula=DEFAULT_FORMULA,
+    search_zip="",
+    wellness_range=None,
+    sort_option=None,
+):
+    """CSV of the full table, or of the rows matching the Data Table filters"""
+    wellness_df = score_table(fingerprint, formula)
+    if wellness_range is not None:
+        rows = load_table_index(fingerprint, formula).select(
+            search_zip, *wellness_range, *SORT_ORDERS[sort_option]
+        )
+        wellness_df = wellness_df.iloc[rows]
+    return wellness_df.to_csv(index=False).encode("utf-8")
+
+
+@st.cache_data(show_spinner=False)
+def load_zip_history(fingerprint, zipcode, start=None, end=None):
+    """One ZIP code's snapshots, read from the per-ZIP index"""
+    return zip_history(zipcode, start, end)
 
 
 # Main function
-def main():
+def render_dashboard():
     # Add title and description
     st.title("NYC Sidewalk Wellness Score")
     st.markdown(
@@ -123,133 +548,116 @@ def main():
         unsafe_allow_html=True,
     )
 
-    # Load data
+    # The metrics come from the small precomputed summary, so they show
+    # before the full tables are loaded
     with st.spinner("Loading data..."):
-        wellness_df, geo_df, has_geo, zipcode_field = load_data()
+        fingerprint = data_fingerprint()
+        formulas = available_formulas(load_scoring_denominators(fingerprint))
+
+    # Switching formula only rescores the cached counts
+    formula = st.sidebar.selectbox(
+        "Scoring formula",
+        formulas,
+        format_func=lambda name: FORMULAS[name][0],
+        help="Area and lot based formulas appear once `python src/scoring.py` "
+        "or the pipeline has computed the ZIP code denominators.",
+    )
+
+    with st.spinner("Loading data..."):
+        with stage("load_summary"):
+            summary = load_score_summary(fingerprint, formula)
+    stats = summary["stats"]
 
     # Show data overview
     st.subheader("Data Overview")
     col1, col2, col3, col4 = st.columns(4)
 
     with col1:
-        st.metric("Total ZIP Codes", len(wellness_df))
+        st.metric("Total ZIP Codes", summary["count"])
 
     with col2:
-        st.metric(
-            "Average Wellness Score", f"{wellness_df['wellness_score'].mean():.2f}%"
-        )
+        st.metric("Average Wellness Score", f"{stats['mean']:.2f}%")
 
     with col3:
-        st.metric(
-            "Highest Wellness Score", f"{wellness_df['wellness_score'].max():.2f}%"
-        )
+        st.metric("Highest Wellness Score", f"{stats['max']:.2f}%")
 
     with col4:
-        st.metric(
-            "Lowest Wellness Score", f"{wellness_df['wellness_score'].min():.2f}%"
-        )
+        st.metric("Lowest Wellness Score", f"{stats['min']:.2f}%")
+
+    with st.spinner("Loading data..."):
+        with stage("load_data"):
+            has_geo, zipcode_field = load_data(fingerprint)[1:]
+            wellness_df = score_table(fingerprint, formula)
 
     # Create tabs for different visualizations
-    tab1, tab2, tab3 = st.tabs(["Map", "Rankings", "Data Table"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(
+        ["Map", "Rankings", "Data Table", "Trends", "Boroughs"]
+    )
 
     # Tab 1: Map view
     with tab1:
         if has_geo and zipcode_field:
-            st.subheader("Sidewalk Wellness Score by ZIP Code")
-
-            # Display the correct zipcode field being used
-            st.info(
-                f"Using '{zipcode_field}' as the ZIP code field in the geospatial data."
-            )
-
-            # Create a folium map centered on NYC
-            m = folium.Map(
-                location=[40.7128, -74.0060], zoom_start=10, tiles="CartoDB positron"
-            )
-
-            # Create a custom colormap from red to green
-            colors = [
-                "#FF0000",
-                "#FFA500",
-                "#FFFF00",
-                "#ADFF2F",
-                "#32CD32",
-                "#228B22",
-                "#006400",
-            ]
-            custom_cm = LinearColormap(
-                colors, vmin=0, vmax=100, caption="Wellness Score (%)"
-            )
-
-            # Create a lookup dictionary for easier access to wellness scores
-            score_dict = dict(
-                zip(wellness_df["zipcode"].astype(str), wellness_df["wellness_score"])
-            )
-            inspection_dict = dict(
-                zip(wellness_df["zipcode"].astype(str), wellness_df["inspection_count"])
-            )
-
-            # Define style function
-            def style_function(feature):
-                zipcode = feature["properties"].get(zipcode_field)
-                if zipcode in score_dict:
-                    score = score_dict[zipcode]
-                    color = get_color(score)
-                else:
-                    color = "#CCCCCC"  # Gray for missing data
-
-                return {
-                    "fillColor": color,
-                    "color": "#000000",
-                    "weight": 1,
-                    "fillOpacity": 0.7,
+            # Offer sub-ZIP resolutions when their map levels have been built
+            resolution = "zip"
+            sub_resolutions = sub_zip_resolutions()
+            if sub_resolutions:
+                labels = {
+                    res: load_simplified_levels(fingerprint, res)["label"]
+                    for res in sub_resolutions
                 }
+                labels["zip"] = "ZIP Code"
+                resolution = st.radio(
+                    "Map resolution",
+                    ["zip"] + sub_resolutions,
+                    format_func=labels.get,
+                    horizontal=True,
+                )
+
+            simplified = load_simplified_levels(fingerprint, resolution)
+            label = simplified["label"] if simplified else "ZIP Code"
+            st.subheader(f"Sidewalk Wellness Score by {label}")
 
-            # Add GeoJSON layer with custom styling
-            geojson = folium.GeoJson(
-                data=geo_df, style_function=style_function, name="Wellness Scores"
-            )
-
-            # Add tooltips to show information when hovering over a ZIP code
-            tooltip = folium.GeoJsonTooltip(
-                fields=[zipcode_field, "wellness_score", "inspection_count"],
-                aliases=["ZIP Code:", "Wellness Score (%):", "Inspection Count:"],
-                localize=True,
-                sticky=False,
-                labels=True,
-                style="""
-                    background-color: #F0F0F0;
-                    border: 2px solid black;
-                    border-radius: 3px;
-                    box-shadow: 3px;
-                """,
-            )
-            tooltip.add_to(geojson)
-            geojson.add_to(m)
-
-            # Add a legend
-            custom_cm.add_to(m)
-
-            # Display the map using streamlit-folium
-            st_folium(m, width=1000, height=600, returned_objects=[])
+            # Display the correct zipcode field being used
+            if resolution == "zip":
+                st.info(
+                    f"Using '{zipcode_field}' as the ZIP code field in the geospatial data."
+                )
+
+            # Serve precomputed simplified geometries when they have been built
+            zoom = 10
+            if simplified:
+                zoom = st.select_slider(
+                    "Map zoom level",
+                    options=[level["zoom"] for level in simplified["levels"]],
+                    value=min(level["zoom"] for level in simplified["levels"]),
+                    help="Higher zoom levels load more detailed boundaries.",
+                )
+
+            # Build the map once per data version, zoom and resolution; later
+            # reruns reuse the cached HTML instead of re-rendering every polygon
+            with st.spinner("Rendering map..."):
+                with stage("build_map"):
+                    map_html = build_map_html(fingerprint, zoom, resolution, formula)
+
+            # Display the map
+            components.html(map_html, width=1000, height=600)
 
             st.caption(
                 "A higher wellness score (darker green) indicates better sidewalk conditions."
             )
 
             # Add a description of the color scale
+            scale_items = "".join(
+                f'<li><span style="color: {color}; font-weight: bold;">{name}</span>: '
+                f"{rating} ({low}-{high}%)</li>"
+                for color, name, rating, low, high in class_ranges()
+            )
             st.markdown(
-                """
+                f"""
             <div style="margin-top: 20px;">
             <h4>Color Scale Interpretation:</h4>
             <ul>
-                <li><span style="color: #006400; font-weight: bold;">Dark Green</span>: Excellent (90-100%)</li>
-                <li><span style="color: #228B22; font-weight: bold;">Forest Green</span>: Very Good (75-89%)</li>
-                <li><span style="color: #32CD32; font-weight: bold;">Lime Green</span>: Good (60-74%)</li>
-                <li><span style="color: #ADFF2F; font-weight: bold;">Green Yellow</span>: Above Average (45-59%)</li>
-                <li><span style="color: #FFFF00; font-weight: bold;">Yellow</span>: Average (30-44%)</li>
-                <li><span style="color: #FFA500; font-weight: bold;">Orange</span>: Below Average (15-29%)</li>
-                <li><span style="color: #FF0000; font-weight: bold;">Red</span>: Poor (0-14%)</li>
+                {scale_items}
                 <li><span style="color: #CCCCCC; font-weight: bold;">Gray</span>: No Data</li>
             </ul>
             </div>
@@ -262,6 +670,8 @@ def main():
             )
 
             # Show a bar chart instead
+            import plotly.express as px
+
             fig = px.bar(
                 wellness_df.sort_values("wellness_score", ascending=False).head(20),
                 x="zipcode",
@@ -278,6 +688,8 @@ def main():
             )
 
             # Show a bar chart instead
+            import plotly.express as px
+
             fig = px.bar(
                 wellness_df.sort_values("wellness_score", ascending=False).head(20),
                 x="zipcode",
@@ -291,17 +703,15 @@ def main():
 
     # Tab 2: Rankings
     with tab2:
+        import plotly.express as px
+
         st.subheader("ZIP Code Rankings")
 
         col1, col2 = st.columns(2)
 
         with col1:
             st.markdown("### Top 10 ZIP Codes (Highest Wellness Score)")
-            top_df = (
-                wellness_df.sort_values("wellness_score", ascending=False)
-                .head(10)
-                .reset_index(drop=True)
-            )
+            top_df = pd.DataFrame(summary["top"])
             st.dataframe(
                 top_df.style.background_gradient(
                     subset=["wellness_score"], cmap="YlGn"
@@ -324,11 +734,7 @@ def main():
 
         with col2:
             st.markdown("### Bottom 10 ZIP Codes (Lowest Wellness Score)")
-            bottom_df = (
-                wellness_df.sort_values("wellness_score")
-                .head(10)
-                .reset_index(drop=True)
-            )
+            bottom_df = pd.DataFrame(summary["bottom"])
             st.dataframe(
                 bottom_df.style.background_gradient(
                     subset=["wellness_score"], cmap="YlOrRd_r"
@@ -351,15 +757,39 @@ def main():
 
         # Show distribution of wellness scores
         st.subheader("Distribution of Wellness Scores")
+
+        # The charts and statistics are read off a score sketch. Any set of
+        # boroughs is covered by merging their sketches from the rollups,
+        # without going back to the scores
+        sketch = ScoreSketch.from_dict(summary["sketch"])
+        with stage("load_rollups"):
+            rollups = load_rollup_cube(fingerprint, formula)
+        if rollups is not None:
+            nodes = rollups["nodes"]
+            boroughs = st.multiselect(
+                "Boroughs",
+                nodes[rollups["root"]]["children"],
+                format_func=lambda node_id: nodes[node_id]["name"],
+                placeholder=f"All of {nodes[rollups['root']]['name']}",
+                key="distribution_boroughs",
+            )
+            if boroughs:
+                sketch = ScoreSketch.merge_all(
+                    ScoreSketch.from_dict(nodes[borough]["sketch"])
+                    for borough in boroughs
+                )
+        distribution = sketch_stats(sketch)
+        histogram = sketch_histogram(sketch)
+
         col1, col2 = st.columns(2)
 
         with col1:
-            # Histogram
-            fig = px.histogram(
-                wellness_df,
-                x="wellness_score",
-                nbins=20,
-                labels={"wellness_score": "Wellness Score (%)"},
+            # Histogram, drawn from the sketch's bins
+            edges = histogram["edges"]
+            fig = px.bar(
+                x=[(low + high) / 2 for low, high in zip(edges, edges[1:])],
+                y=histogram["counts"],
+                labels={"x": "Wellness Score (%)", "y": "count"},
                 title="Distribution of Sidewalk Wellness Scores",
                 color_discrete_sequence=["#1E88E5"],
             )
@@ -367,13 +797,30 @@ def main():
             st.plotly_chart(fig, use_container_width=True)
 
         with col2:
-            # Box plot
-            fig = px.box(
-                wellness_df,
-                y="wellness_score",
-                labels={"wellness_score": "Wellness Score (%)"},
+            import plotly.graph_objects as go
+
+            # Box plot of the sketch's quartiles, with whiskers 1.5 IQR past
+            # them or at the extremes, whichever are closer
+            iqr = distribution["q75"] - distribution["q25"]
+            fig = go.Figure(
+                go.Box(
+                    q1=[distribution["q25"]],
+                    median=[distribution["median"]],
+                    q3=[distribution["q75"]],
+                    lowerfence=[
+                        max(distribution["min"], distribution["q25"] - 1.5 * iqr)
+                    ],
+                    upperfence=[
+                        min(distribution["max"], distribution["q75"] + 1.5 * iqr)
+                    ],
+                    mean=[distribution["mean"]],
+                    name="",
+                    marker_color="#1E88E5",
+                )
+            )
+            fig.update_layout(
                 title="Box Plot of Wellness Scores",
-                color_discrete_sequence=["#1E88E5"],
+                yaxis_title="Wellness Score (%)",
             )
             st.plotly_chart(fig, use_container_width=True)
 
@@ -391,13 +838,13 @@ def main():
                     "Maximum",
                 ],
                 "Value": [
-                    f"{wellness_df['wellness_score'].mean():.2f}%",
-                    f"{wellness_df['wellness_score'].median():.2f}%",
-                    f"{wellness_df['wellness_score'].std():.2f}%",
-                    f"{wellness_df['wellness_score'].min():.2f}%",
-                    f"{wellness_df['wellness_score'].quantile(0.25):.2f}%",
-                    f"{wellness_df['wellness_score'].quantile(0.75):.2f}%",
-                    f"{wellness_df['wellness_score'].max():.2f}%",
+                    f"{distribution['mean']:.2f}%",
+                    f"{distribution['median']:.2f}%",
+                    f"{distribution['std']:.2f}%",
+                    f"{distribution['min']:.2f}%",
+                    f"{distribution['q25']:.2f}%",
+                    f"{distribution['q75']:.2f}%",
+                    f"{distribution['max']:.2f}%",
                 ],
             }
         )
@@ -406,91 +853,186 @@ def main():
     # Tab 3: Data table
     with tab3:
         st.subheader("Complete Dataset")
+        with stage("table_index"):
+            table_index = load_table_index(fingerprint, formula)
 
         # Filter options
         col1, col2 = st.columns([1, 2])
 
         with col1:
             # Add a search box
-            search_zip = st.text_input("Search by ZIP Code", "")
+            search_zip = st.text_input("Search by ZIP Code", "").strip()
 
         with col2:
             # Add a range slider for filtering by wellness score
             wellness_range = st.slider(
                 "Filter by Wellness Score Range (%)",
-                min_value=float(wellness_df["wellness_score"].min()),
-                max_value=float(wellness_df["wellness_score"].max()),
-                value=(
-                    float(wellness_df["wellness_score"].min()),
-                    float(wellness_df["wellness_score"].max()),
-                ),
+                min_value=float(stats["min"]),
+                max_value=float(stats["max"]),
+                value=(float(stats["min"]), float(stats["max"])),
             )
 
-        # Apply filters
-        filtered_df = wellness_df.copy()
-
-        if search_zip:
-            filtered_df = filtered_df[
-                filtered_df["zipcode"].astype(str).str.contains(search_zip)
-            ]
-
-        filtered_df = filtered_df[
-            (filtered_df["wellness_score"] >= wellness_range[0])
-            & (filtered_df["wellness_score"] <= wellness_range[1])
-        ]
-
         # Sort options
         sort_options = st.radio(
             "Sort by:",
-            [
-                "ZIP Code (Ascending)",
-                "ZIP Code (Descending)",
-                "Wellness Score (Highest First)",
-                "Wellness Score (Lowest First)",
-            ],
+            list(SORT_ORDERS),
             horizontal=True,
         )
 
-        if sort_options == "ZIP Code (Ascending)":
-            filtered_df = filtered_df.sort_values("zipcode")
-        elif sort_options == "ZIP Code (Descending)":
-            filtered_df = filtered_df.sort_values("zipcode", ascending=False)
-        elif sort_options == "Wellness Score (Highest First)":
-            filtered_df = filtered_df.sort_values("wellness_score", ascending=False)
-        else:  # "Wellness Score (Lowest First)"
-            filtered_df = filtered_df.sort_values("wellness_score")
+        # Apply filters and sorting through the index
+        with stage("table_select") as timed:
+            rows = table_index.select(
+                search_zip, *wellness_range, *SORT_ORDERS[sort_options]
+            )
+            timed.rows = len(rows)
+
+        # Paginate so only the visible rows are styled and sent to the browser
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1)
+        page_count = max((len(rows) - 1) // page_size + 1, 1)
+        with col2:
+            page = st.number_input(
+                f"Page (of {page_count})", min_value=1, max_value=page_count, value=1
+            )
+        page_rows = rows[(page - 1) * page_size : page * page_size]
 
         # Show the data with styling
+        page_df = wellness_df.iloc[page_rows]
         st.dataframe(
-            filtered_df.style.background_gradient(
-                subset=["wellness_score"], cmap="RdYlGn", vmin=0, vmax=100
-            ),
+            page_df.style.apply(score_cell_styles, subset=["wellness_score"]),
             height=500,
             use_container_width=True,
         )
 
         # Add count of filtered records
-        st.markdown(f"**Showing {len(filtered_df)} of {len(wellness_df)} records**")
-
-        # Download options
-        col1, col2 = st.columns(2)
-
-        with col1:
-            st.download_button(
-                label="📥 Download All Data as CSV",
-                data=wellness_df.to_csv(index=False).encode("utf-8"),
-                file_name="nyc_sidewalk_wellness_scores.csv",
-                mime="text/csv",
+        st.markdown(f"**Showing {len(rows)} of {len(wellness_df)} records**")
+
+        # Download options, only serialized once someone asks for them
+        if st.toggle("Prepare CSV downloads"):
+            col1, col2 = st.columns(2)
+
+            with col1:
+                st.download_button(
+                    label="📥 Download All Data as CSV",
+                    data=table_csv(fingerprint, formula),
+                    file_name="nyc_sidewalk_wellness_scores.csv",
+                    mime="text/csv",
+                )
+
+            with col2:
+                st.download_button(
+                    label="📥 Download Filtered Data as CSV",
+                    data=table_csv(
+                        fingerprint, formula, search_zip, wellness_range, sort_options
+                    ),
+                    file_name="nyc_sidewalk_wellness_scores_filtered.csv",
+                    mime="text/csv",
+                    disabled=len(rows) == 0,
+                )
+
+    # Tab 4: Trends across the stored snapshots
+    with tab4:
+        st.subheader("Wellness Score Trends")
+        snapshots = list_snapshots()
+
+        if not snapshots:
+            st.info(
+                "No snapshots have been stored yet. Run `python src/pipeline.py` on "
+                "a dated export, or `python src/data_cleaning.py --snapshot`, to "
+                "start the history."
             )
-
-        with col2:
-            st.download_button(
-                label="📥 Download Filtered Data as CSV",
-                data=filtered_df.to_csv(index=False).encode("utf-8"),
-                file_name="nyc_sidewalk_wellness_scores_filtered.csv",
-                mime="text/csv",
-                disabled=len(filtered_df) == 0,
+        else:
+            import plotly.express as px
+
+            col1, col2 = st.columns([1, 2])
+
+            with col1:
+                trend_zip = st.selectbox(
+                    "ZIP Code",
+                    format_zipcodes(table_index.sorted_keys).tolist(),
+                    key="trend_zip",
+                )
+
+            with col2:
+                start, end = snapshots[0], snapshots[-1]
+                if len(snapshots) > 1:
+                    start, end = st.select_slider(
+                        "Snapshot range", options=snapshots, value=(start, end)
+                    )
+
+            if formula != DEFAULT_FORMULA:
+                st.caption(
+                    "Snapshots keep the scores they were stored with, computed "
+                    f"as {FORMULAS[DEFAULT_FORMULA][0].lower()}."
+                )
+
+            # Only this ZIP code's rows are read from the snapshot index
+            with stage("zip_history"):
+                history = load_zip_history(fingerprint, trend_zip, start, end)
+
+            if history.empty:
+                st.info(f"No snapshots of ZIP code {trend_zip} in this range.")
+            else:
+                first, last = history.iloc[0], history.iloc[-1]
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Snapshots", len(history))
+                with col2:
+                    st.metric(
+                        f"Wellness Score on {last['snapshot_date']}",
+                        f"{last['wellness_score']:.2f}%",
+                        f"{last['wellness_score'] - first['wellness_score']:+.2f} "
+                        f"since {first['snapshot_date']}",
+                    )
+                with col3:
+                    st.metric(
+                        f"Inspection Count on {last['snapshot_date']}",
+                        int(last["inspection_count"]),
+                        int(last["inspection_count"] - first["inspection_count"]),
+                        delta_color="inverse",
+                    )
+
+                fig = px.line(
+                    history,
+                    x="snapshot_date",
+                    y="wellness_score",
+                    markers=True,
+                    title=f"Wellness Score of ZIP Code {trend_zip}",
+                    labels={
+                        "snapshot_date": "Snapshot Date",
+                        "wellness_score": "Wellness Score (%)",
+                    },
+                    color_discrete_sequence=["#1E88E5"],
+                )
+                st.plotly_chart(fig, use_container_width=True)
+
+                fig = px.bar(
+                    history,
+                    x="snapshot_date",
+                    y="inspection_count",
+                    title=f"Inspections in ZIP Code {trend_zip}",
+                    labels={
+                        "snapshot_date": "Snapshot Date",
+                        "inspection_count": "Inspection Count",
+                    },
+                    color_discrete_sequence=["#005CB2"],
+                )
+                st.plotly_chart(fig, use_container_width=True)
+
+    # Tab 5: Borough and neighborhood drill-down
+    with tab5:
+        st.subheader("Boroughs and Neighborhoods")
+        with stage("load_rollups"):
+            rollups = load_rollup_cube(fingerprint, formula)
+
+        if rollups is None:
+            st.info(
+                "Borough and neighborhood rollups need the ZIP code boundaries. "
+                "Run `python src/pipeline.py` to build them."
             )
+        else:
+            show_drill_down(rollups)
 
     # Footer
     st.markdown("---")
@@ -501,19 +1043,20 @@ def main():
 
     with col1:
         st.markdown(
-            """
+            f"""
         ### About the Wellness Score
         
-        The Sidewalk Wellness Score is calculated based on the following formula:
+        The Sidewalk Wellness Score is calculated based on the following formula
+        ({FORMULAS[formula][0].lower()}):
         
         ```
-        wellness_score = (1 - (inspection_count / max_inspection_count)) * 100
+        {FORMULAS[formula][1]}
         ```
         
         A lower number of inspections (implying fewer defects) corresponds to a higher score. This means:
         
-        - 100% = Perfect score (no inspections recorded)
-        - 0% = Lowest possible score (maximum number of inspections)
+        - 100% = Best score (fewest inspections)
+        - 0% = Lowest possible score (most inspections)
         """
         )
 
@@ -543,5 +1086,169 @@ def main():
     )
 
 
+def show_drill_down(rollups):
+    """Show a node of the rollup cube, picked level by level from the city down"""
+    import plotly.express as px
+
+    nodes = rollups["nodes"]
+    node = nodes[rollups["root"]]
+    labels = {"borough": "Borough", "neighborhood": "Neighborhood", "zip": "ZIP Code"}
+
+    # Each level's options are the children of the node picked above it
+    for column, level in zip(st.columns(3), rollups["levels"][1:]):
+        with column:
+            choice = st.selectbox(
+                labels[level],
+                [None] + node["children"],
+                format_func=lambda node_id, parent=node: (
+                    f"All of {parent['name']}"
+                    if node_id is None
+                    else nodes[node_id]["name"]
+                ),
+                key=f"drill_{level}",
+            )
+        if choice is None:
+            break
+        node = nodes[choice]
+
+    if node["level"] == "zip":
+        borough = nodes[nodes[node["parent"]]["parent"]]
+        record = node["record"]
+        if node["rank"]["city"] is None:
+            st.info(f"ZIP code {node['name']} has no score under this formula.")
+            return
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Wellness Score", f"{record['wellness_score']:.2f}%")
+        with col2:
+            st.metric("Inspection Count", record["inspection_count"])
+        with col3:
+            st.metric(
+                f"Rank in {borough['name']}",
+                f"{node['rank']['borough']} of {borough['count']}",
+            )
+        with col4:
+            st.metric(
+                "Rank in the City",
+                f"{node['rank']['city']} of {nodes[rollups['root']]['count']}",
+            )
+        return
+
+    stats = node["stats"]
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("ZIP Codes", node["count"])
+    with col2:
+        st.metric("Inspections", f"{node['inspection_count']:,}")
+    with col3:
+        st.metric("Average Wellness Score", f"{stats['mean']:.2f}%")
+    with col4:
+        st.metric("Median Wellness Score", f"{stats['median']:.2f}%")
+
+    # One row per child, compared on their precomputed statistics
+    children = [nodes[child] for child in node["children"]]
+    if children[0]["level"] == "zip":
+        breakdown = pd.DataFrame([child["record"] for child in children])
+        x, y = "zipcode", "wellness_score"
+    else:
+        breakdown = pd.DataFrame(
+            {
+                "name": [child["name"] for child in children],
+                "zip_codes": [child["count"] for child in children],
+                "inspection_count": [child["inspection_count"] for child in children],
+                **{
+                    f"{stat}_score": [child["stats"][stat] for child in children]
+                    for stat in ["mean", "median", "min", "max"]
+                },
+            }
+        )
+        x, y = "name", "mean_score"
+
+    col1, col2 = st.columns(2)
+    with col1:
+        fig = px.bar(
+            breakdown,
+            x=x,
+            y=y,
+            color=y,
+            color_continuous_scale="RdYlGn",
+            title=f"{labels[children[0]['level']]}s of {node['name']}",
+            labels={x: labels[children[0]["level"]], y: "Wellness Score (%)"},
+        )
+        fig.update_layout(xaxis_tickangle=-45)
+        st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        edges = node["histogram"]["edges"]
+        fig = px.bar(
+            x=[(low + high) / 2 for low, high in zip(edges, edges[1:])],
+            y=node["histogram"]["counts"],
+            labels={"x": "Wellness Score (%)", "y": "count"},
+            title=f"Distribution of Wellness Scores in {node['name']}",
+            color_discrete_sequence=["#1E88E5"],
+        )
+        fig.update_layout(bargap=0.1)
+        st.plotly_chart(fig, use_container_width=True)
+
+    st.dataframe(breakdown, use_container_width=True, hide_index=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown(f"### Top ZIP Codes in {node['name']}")
+        st.dataframe(pd.DataFrame(node["top"]), hide_index=True)
+    with col2:
+        st.markdown(f"### Bottom ZIP Codes in {node['name']}")
+        st.dataframe(pd.DataFrame(node["bottom"]), hide_index=True)
+
+    st.table(
+        pd.DataFrame(
+            {
+                "Statistic": [
+                    "Minimum",
+                    "25th Percentile",
+                    "Median",
+                    "75th Percentile",
+                    "Maximum",
+                    "Standard Deviation",
+                ],
+                "Value": [
+                    f"{stats[stat]:.2f}%"
+                    for stat in ["min", "q25", "median", "q75", "max", "std"]
+                ],
+            }
+        )
+    )
+
+
+def show_timing_panel(recorder):
+    """Show this run's stage timings and those of the last pipeline run"""
+    st.subheader("Timings")
+    report = recorder.report()
+    st.markdown(
+        f"This run took **{report['total_seconds'] * 1000:.0f} ms**. Stages "
+        "answered from the cache take almost no time; clear the cache to "
+        "time them from scratch."
+    )
+    st.dataframe(pd.DataFrame(report["stages"]), use_container_width=True)
+
+    pipeline_report = load_report(REPORT_PATH)
+    if pipeline_report:
+        st.markdown(
+            f"Last instrumented pipeline run (`{REPORT_PATH}`), started "
+            f"{pipeline_report['started']}: "
+            f"**{pipeline_report['total_seconds']:.2f} s** in total."
+        )
+        st.dataframe(pd.DataFrame(pipeline_report["stages"]), use_container_width=True)
+
+
+def main():
+    # Stage timings are only recorded while the panel is shown
+    show_timings = st.sidebar.toggle("Show timing panel", key="show_timings")
+    with recording(report_path=None) if show_timings else nullcontext() as recorder:
+        with stage("dashboard"):
+            render_dashboard()
+    if recorder is not None:
+        show_timing_panel(recorder)
+
+
 if __name__ == "__main__":
     main()
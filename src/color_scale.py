@@ -0,0 +1,59 @@
+import numpy as np
+
+# Lower bounds (%) of the wellness score colour classes, from Poor upwards
+SCORE_BINS = [15, 30, 45, 60, 75, 90]
+
+# One colour, name and rating per class, from Poor (0-14%) to Excellent (90-100%)
+SCORE_CLASSES = [
+    ("#FF0000", "Red", "Poor"),
+    ("#FFA500", "Orange", "Below Average"),
+    ("#FFFF00", "Yellow", "Average"),
+    ("#ADFF2F", "Green Yellow", "Above Average"),
+    ("#32CD32", "Lime Green", "Good"),
+    ("#228B22", "Forest Green", "Very Good"),
+    ("#006400", "Dark Green", "Excellent"),
+]
+SCORE_COLORS = [color for color, _, _ in SCORE_CLASSES]
+NO_DATA_COLOR = "#CCCCCC"
+
+# Classes dark enough to need light text on top of them
+DARK_CLASSES = {5, 6}
+
+# Index -1 (missing score) wraps around to the no-data colour
+_PALETTE = np.array(SCORE_COLORS + [NO_DATA_COLOR])
+
+
+def classify_scores(scores):
+    """
+    Bin wellness scores into colour class indices in one vectorized pass.
+
+    Returns 0 (Poor) to 6 (Excellent) per score, or -1 for missing scores.
+    """
+    scores = np.asarray(scores, dtype=float)
+    classes = np.digitize(scores, SCORE_BINS)
+    return np.where(np.isnan(scores), -1, classes)
+
+
+def score_colors(scores):
+    """Map an array of wellness scores to their class colours."""
+    return _PALETTE[classify_scores(scores)]
+
+
+def score_cell_styles(scores):
+    """CSS for table cells, coloured with the same classes as the map."""
+    classes = classify_scores(scores)
+    return [
+        f"background-color: {_PALETTE[c]}; color: "
+        + ("#FFFFFF" if c in DARK_CLASSES else "#000000")
+        for c in classes
+    ]
+
+
+def class_ranges():
+    """Yield (colour, name, rating, low, high) for each class, best first."""
+    lows = [0] + SCORE_BINS
+    highs = [b - 1 for b in SCORE_BINS] + [100]
+    for (color, name, rating), low, high in reversed(
+        list(zip(SCORE_CLASSES, lows, highs))
+    ):
+        yield color, name, rating, low, high
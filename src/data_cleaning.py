@@ -1,19 +1,35 @@
+import argparse
+import csv
+import io
+import json
+import os
+from functools import reduce
+from multiprocessing import Pool
+
+import numpy as np
 import pandas as pd
 
-# Load CSV file
-print("Loading data...")
-df = pd.read_csv("data/Sidewalk_Management_Database-Lot_Info_20250408.csv")
-print("Data loaded successfully.")
-print(f"Dataset shape: {df.shape}")
-print("\nFirst 5 rows:")
-print(df.head())
+from instrumentation import add_arguments, recording_from_args, stage, timed_chunks
+from scoring import DEFAULT_FORMULA, score_counts
+from snapshot_store import add_snapshot, parse_snapshot_date, snapshot_date_from_path
+from spatial_index import CENTROIDS_PATH, PolygonIndex, load_centroids, locate_lots
+from summary import SUMMARY_PATH, write_summary
+from zip_codes import (
+    MISSING_ZIP,
+    ZIP_CODE_COUNT,
+    bincount_zipcodes,
+    dense_counts_to_series,
+    parse_zipcodes,
+)
+from zip_schema import ZIPCODES_PATH, read_zip_boundaries, resolve_zip_schema
 
-# Check for column names and rename if necessary
-print("\nColumn names:")
-print(df.columns.tolist())
+RAW_DATA_PATH = "data/Sidewalk_Management_Database-Lot_Info_20250408.csv"
+OUTPUT_PATH = "data/wellness_scores.csv"
+PARQUET_OUTPUT_PATH = "data/wellness_scores.parquet"
+STATE_PATH = "data/zipcode_counts_state.json"
 
 # Rename columns to match expected names in the instructions
-column_mapping = {
+COLUMN_MAPPING = {
     "Borough, Block and Lot (BBL) ID": "bblid",
     "Block": "block",
     "Borough": "boro",
@@ -21,47 +37,589 @@ column_mapping = {
     "ZIP Code": "zipcode",
 }
 
-df = df.rename(columns=column_mapping)
-print("\nRenamed columns:")
-print(df.columns.tolist())
-
-# Check for missing values
-print("\nChecking for missing values:")
-missing_values = df.isnull().sum()
-print(
-    missing_values[missing_values > 0]
-    if any(missing_values > 0)
-    else "No missing values found."
-)
+# The only raw column the wellness score depends on, read with a compact dtype
+# so streaming mode never materializes the other columns.
+ZIP_COLUMN = "ZIP Code"
+STREAM_DTYPES = {ZIP_COLUMN: "category"}
+DEFAULT_CHUNKSIZE = 250_000
+
+# Spatial ZIP assignment: lots are placed in ZIP polygons by their coordinates,
+# taken from the export when it has them or from a BBL centroid table
+BBL_COLUMN = "Borough, Block and Lot (BBL) ID"
+LATITUDE_COLUMN = "Latitude"
+LONGITUDE_COLUMN = "Longitude"
+
+
+def count_zipcodes(zip_values):
+    """
+    Count rows per 5-digit ZIP code, dropping values that don't contain one.
+
+    The raw values are counted first, and only the distinct strings are
+    parsed into integer ZIP codes, whose counts are summed into a dense array
+    indexed by the code rather than grouped as strings.
+    """
+    with stage("value_counts", rows=len(zip_values)):
+        raw_counts = zip_values.value_counts(sort=False)
+    with stage("extract_zip", rows=len(raw_counts)):
+        zips = parse_zipcodes(raw_counts.index)
+    with stage("bincount"):
+        return dense_counts_to_series(bincount_zipcodes(zips, raw_counts.to_numpy()))
+
+
+def merge_counts(totals, partial):
+    """Add one partial per-ZIP count into the running totals."""
+    return totals.add(partial, fill_value=0)
+
+
+def finalize_counts(totals):
+    """Turn merged per-ZIP totals into the sorted `zipcode_counts` frame."""
+    return (
+        totals.astype("int64")
+        .sort_index()
+        .rename_axis("zipcode")
+        .reset_index(name="inspection_count")
+    )
+
+
+def stream_zipcode_counts(path, chunksize=DEFAULT_CHUNKSIZE, verbose=True):
+    """
+    Build the per-ZIP inspection counts by reading the raw CSV in chunks.
+
+    Each chunk is reduced to a small partial count that is folded into the
+    running totals, so peak memory depends on the chunk size and the number of
+    distinct ZIP codes rather than on the size of the export.
+    """
+    totals = pd.Series(dtype="int64")
+    rows_read = 0
+    reader = pd.read_csv(
+        path, usecols=[ZIP_COLUMN], dtype=STREAM_DTYPES, chunksize=chunksize
+    )
+    for chunk in timed_chunks(reader):
+        rows_read += len(chunk)
+        totals = merge_counts(totals, count_zipcodes(chunk[ZIP_COLUMN]))
+    if verbose:
+        print(f"Streamed {rows_read} rows in chunks of {chunksize}.")
+
+    return finalize_counts(totals)
+
+
+class ByteRangeReader(io.RawIOBase):
+    """Read-only view of bytes [start, end) of a file."""
+
+    def __init__(self, path, start, end):
+        self._file = open(path, "rb")
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        n = self._file.readinto(memoryview(buffer)[:size])
+        self._remaining -= n
+        return n
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def split_byte_ranges(path, n_ranges):
+    """
+    Split the rows of a CSV into roughly equal byte ranges.
+
+    Every range starts at the beginning of a line and ends at the beginning of
+    the next range, so no row is cut in half. Assumes, like the lot info
+    export, that quoted fields never contain newlines.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.readline()
+        data_start = f.tell()
+        step = max((size - data_start) // n_ranges, 1)
+        boundaries = [data_start]
+        for i in range(1, n_ranges):
+            f.seek(max(data_start + i * step, boundaries[-1]))
+            f.readline()  # Move to the start of the next line
+            if f.tell() >= size:
+                break
+            if f.tell() > boundaries[-1]:
+                boundaries.append(f.tell())
+        boundaries.append(size)
+
+    columns = next(csv.reader([header.decode("utf-8-sig")]))
+    ranges = [
+        (start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start
+    ]
+    return columns, ranges
+
+
+def count_zipcodes_in_range(path, columns, start, end, chunksize):
+    """Parse one byte range of the raw CSV and count its rows per ZIP code."""
+    totals = pd.Series(dtype="int64")
+    with io.BufferedReader(ByteRangeReader(path, start, end)) as f:
+        reader = pd.read_csv(
+            f,
+            header=None,
+            names=columns,
+            usecols=[ZIP_COLUMN],
+            dtype=STREAM_DTYPES,
+            chunksize=chunksize,
+        )
+        for chunk in reader:
+            totals = merge_counts(totals, count_zipcodes(chunk[ZIP_COLUMN]))
+    return totals
+
+
+def parallel_zipcode_counts(path, workers, chunksize=DEFAULT_CHUNKSIZE, verbose=True):
+    """
+    Count inspections per ZIP code with one process per byte range of the CSV.
+
+    Each worker parses, normalizes and counts its own range; the partial
+    counts are then reduced into the same frame the serial path produces.
+    """
+    columns, ranges = split_byte_ranges(path, workers)
+    if verbose:
+        print(f"Counting {len(ranges)} byte ranges with {workers} worker processes...")
+    with Pool(workers) as pool:
+        partials = pool.starmap(
+            count_zipcodes_in_range,
+            [(path, columns, start, end, chunksize) for start, end in ranges],
+        )
+    totals = reduce(merge_counts, partials, pd.Series(dtype="int64"))
+    return finalize_counts(totals)
+
+
+def spatial_zipcode_counts(
+    path,
+    centroids_path=CENTROIDS_PATH,
+    zipcodes_path=ZIPCODES_PATH,
+    chunksize=DEFAULT_CHUNKSIZE,
+    verbose=True,
+):
+    """
+    Count inspections per ZIP code by locating each lot in a ZIP polygon.
+
+    Lots are placed by the export's own coordinates when it has them, or by
+    their BBL in the centroid table, and assigned with one STRtree query per
+    chunk. Lots that can't be located fall back to their ZIP string, but only
+    when it names a ZIP code in the boundary file, so placeholders like 00000
+    no longer get a bucket of their own.
+    """
+    schema = resolve_zip_schema(zipcodes_path)
+    if schema is None:
+        raise ValueError(f"Couldn't identify the ZIP code field of '{zipcodes_path}'.")
+    boundaries = read_zip_boundaries(zipcodes_path, schema, columns=[])
+    boundaries = boundaries.to_crs("EPSG:4326")
+    polygon_zips = parse_zipcodes(boundaries[schema["zip_field"]])
+    known_zips = np.zeros(ZIP_CODE_COUNT, dtype=bool)
+    known_zips[polygon_zips[polygon_zips != MISSING_ZIP]] = True
+    if verbose:
+        print(f"Building spatial index over {len(boundaries)} ZIP code polygons...")
+    index = PolygonIndex(boundaries.geometry.values)
+
+    header = pd.read_csv(path, nrows=0).columns
+    if LATITUDE_COLUMN in header and LONGITUDE_COLUMN in header:
+        if verbose:
+            print("Locating lots by their coordinates in the export.")
+        centroids = None
+        usecols = [LATITUDE_COLUMN, LONGITUDE_COLUMN, ZIP_COLUMN]
+        dtypes = {LATITUDE_COLUMN: "float64", LONGITUDE_COLUMN: "float64"}
+    else:
+        if verbose:
+            print(f"Locating lots by BBL through '{centroids_path}'...")
+        centroids = load_centroids(centroids_path)
+        usecols = [BBL_COLUMN, ZIP_COLUMN]
+        dtypes = {BBL_COLUMN: "float64"}
+
+    totals = np.zeros(ZIP_CODE_COUNT, dtype=np.int64)
+    rows_read = located_rows = fallback_rows = 0
+    reader = pd.read_csv(
+        path, usecols=usecols, dtype={**dtypes, **STREAM_DTYPES}, chunksize=chunksize
+    )
+    for chunk in timed_chunks(reader):
+        rows_read += len(chunk)
+        if centroids is None:
+            lons, lats = chunk[LONGITUDE_COLUMN], chunk[LATITUDE_COLUMN]
+        else:
+            with stage("locate_lots"):
+                lons, lats = locate_lots(chunk[BBL_COLUMN], centroids)
+        with stage("assign_polygons", rows=len(chunk)):
+            assigned = index.assign(lons, lats)
+        located = assigned >= 0
+
+        # Polygons without a usable ZIP code leave their lots unassigned
+        located_counts = bincount_zipcodes(polygon_zips[assigned[located]])
+        located_rows += int(located_counts.sum())
+        totals += located_counts
+
+        with stage("extract_zip", rows=int((~located).sum())):
+            fallback = parse_zipcodes(chunk.loc[~located, ZIP_COLUMN])
+        fallback_counts = bincount_zipcodes(fallback) * known_zips
+        fallback_rows += int(fallback_counts.sum())
+        totals += fallback_counts
+
+    if verbose:
+        print(
+            f"Assigned {located_rows} of {rows_read} records to ZIP polygons; "
+            f"{fallback_rows} more by their ZIP string, "
+            f"{rows_read - located_rows - fallback_rows} dropped."
+        )
+    return finalize_counts(dense_counts_to_series(totals))
+
+
+def compute_wellness_scores(zipcode_counts, formula=DEFAULT_FORMULA, denominators=None):
+    """
+    Add the `wellness_score` column, computed with one of the scoring formulas.
+
+    The default scales each count against the current max count; see
+    `scoring.FORMULAS` for the others.
+    """
+    zipcode_counts["wellness_score"] = score_counts(
+        zipcode_counts, formula, denominators
+    )
+    return zipcode_counts
+
+
+def save_count_state(zipcode_counts, path, applied_deltas=()):
+    """Persist the per-ZIP inspection counts so later runs can apply deltas."""
+    state = {
+        "counts": {
+            zipcode: int(count)
+            for zipcode, count in zip(
+                zipcode_counts["zipcode"], zipcode_counts["inspection_count"]
+            )
+        },
+        "applied_deltas": list(applied_deltas),
+    }
+    with open(path, "w") as f:
+        json.dump(state, f, indent=2)
+
+
+def load_count_state(path):
+    """Load the per-ZIP counts written by `save_count_state`."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"No count state at '{path}'. Run a full cleaning pass before applying deltas."
+        )
+    with open(path, "r") as f:
+        state = json.load(f)
+    totals = pd.Series(state["counts"], dtype="int64")
+    return totals, state.get("applied_deltas", [])
+
+
+def apply_delta(totals, delta_path, verbose=True):
+    """
+    Update per-ZIP totals from a delta export of added and removed lots.
+
+    The delta has the lot info columns plus a `change` column holding
+    "added" or "removed". Records are keyed on `bblid`, so a lot that moved
+    ZIP codes appears once as removed (old ZIP) and once as added (new ZIP).
+    Only the ZIP codes touched by the delta change; ZIP codes whose count
+    drops to zero are removed, as they would be in a full recount.
+    """
+    delta = pd.read_csv(
+        delta_path,
+        usecols=[BBL_COLUMN, ZIP_COLUMN, "change"],
+        dtype={ZIP_COLUMN: str},
+    )
+    delta = delta.rename(columns=COLUMN_MAPPING)
+    delta["change"] = delta["change"].str.strip().str.lower()
+
+    unknown = set(delta["change"].dropna()) - {"added", "removed"}
+    if unknown:
+        raise ValueError(f"Unknown change types in delta: {sorted(unknown)}")
+
+    delta = delta.drop_duplicates(subset=["bblid", "change"])
+    added = count_zipcodes(delta.loc[delta["change"] == "added", "zipcode"])
+    removed = count_zipcodes(delta.loc[delta["change"] == "removed", "zipcode"])
+    if verbose:
+        print(f"Delta adds {added.sum()} and removes {removed.sum()} records.")
+
+    totals = totals.add(added, fill_value=0).sub(removed, fill_value=0)
+    negative = totals[totals < 0]
+    if len(negative) > 0 and verbose:
+        print(
+            f"Warning: {len(negative)} ZIP codes would have negative counts; "
+            "the delta removes records that were never counted."
+        )
+    return totals[totals > 0]
+
+
+def run_cleaning(
+    input_path=RAW_DATA_PATH,
+    output_path=OUTPUT_PATH,
+    parquet_output_path=PARQUET_OUTPUT_PATH,
+    state_path=STATE_PATH,
+    summary_path=SUMMARY_PATH,
+    stream=False,
+    chunksize=DEFAULT_CHUNKSIZE,
+    workers=1,
+    spatial=False,
+    centroids_path=CENTROIDS_PATH,
+    zipcodes_path=ZIPCODES_PATH,
+    delta_path=None,
+    verbose=True,
+):
+    """
+    Aggregate the lot info export by ZIP code and compute wellness scores.
+
+    Returns the `zipcode_counts` frame with `zipcode`, `inspection_count` and
+    `wellness_score` columns, so callers can use it without reading the CSV
+    back. Any of the output paths can be None to skip writing that file.
+
+    With `verbose=False` nothing is printed and the in-memory mode reads only
+    the ZIP code column, skipping the diagnostic full-table passes (previews,
+    missing value counts, summary statistics).
+    """
+    applied_deltas = []
+    if delta_path:
+        if verbose:
+            print(f"Applying delta '{delta_path}' to '{state_path}'...")
+        totals, applied_deltas = load_count_state(state_path)
+        delta_name = os.path.basename(delta_path)
+        if delta_name in applied_deltas:
+            if verbose:
+                print(f"Delta '{delta_name}' was already applied; nothing to do.")
+            return compute_wellness_scores(finalize_counts(totals))
+        with stage("apply_delta"):
+            zipcode_counts = finalize_counts(apply_delta(totals, delta_path, verbose))
+        applied_deltas.append(delta_name)
+        if verbose:
+            print("Data aggregated successfully.")
+    elif spatial:
+        if verbose:
+            print(f"Assigning records from '{input_path}' to ZIP codes spatially...")
+        with stage("spatial_counts"):
+            zipcode_counts = spatial_zipcode_counts(
+                input_path, centroids_path, zipcodes_path, chunksize, verbose
+            )
+    elif workers > 1:
+        if verbose:
+            print(f"Counting data from '{input_path}' in parallel...")
+        with stage("parallel_counts"):
+            zipcode_counts = parallel_zipcode_counts(
+                input_path, workers, chunksize, verbose
+            )
+    elif stream:
+        if verbose:
+            print(f"Streaming data from '{input_path}'...")
+        with stage("stream_counts"):
+            zipcode_counts = stream_zipcode_counts(input_path, chunksize, verbose)
+    elif not verbose:
+        # Only the ZIP code column matters for the counts
+        with stage("read_csv") as timed:
+            zip_values = pd.read_csv(
+                input_path, usecols=[ZIP_COLUMN], dtype=STREAM_DTYPES
+            )
+            timed.rows = len(zip_values)
+        zipcode_counts = finalize_counts(count_zipcodes(zip_values[ZIP_COLUMN]))
+    else:
+        # Load CSV file
+        print("Loading data...")
+        with stage("read_csv") as timed:
+            df = pd.read_csv(input_path)
+            timed.rows = len(df)
+        print("Data loaded successfully.")
+        print(f"Dataset shape: {df.shape}")
+        print("\nFirst 5 rows:")
+        print(df.head())
+
+        # Check for column names and rename if necessary
+        print("\nColumn names:")
+        print(df.columns.tolist())
+
+        df = df.rename(columns=COLUMN_MAPPING)
+        print("\nRenamed columns:")
+        print(df.columns.tolist())
+
+        # Check for missing values
+        print("\nChecking for missing values:")
+        missing_values = df.isnull().sum()
+        print(
+            missing_values[missing_values > 0]
+            if any(missing_values > 0)
+            else "No missing values found."
+        )
+
+        # Group by zipcode and count inspections
+        print("\nAggregating data by zipcode...")
+        # Clean the zipcode column - extract just the 5-digit ZIP code, as
+        # a compact uint32 code
+        with stage("extract_zip", rows=len(df)):
+            df["zipcode"] = parse_zipcodes(df["zipcode"])
+        # Drop rows with missing zipcodes
+        df = df[df["zipcode"] != MISSING_ZIP]
+        print(f"After cleaning zipcode, dataset shape: {df.shape}")
+
+        with stage("bincount", rows=len(df)):
+            zipcode_counts = finalize_counts(
+                dense_counts_to_series(bincount_zipcodes(df["zipcode"]))
+            )
+
+    if verbose and not delta_path:
+        print("Data aggregated successfully.")
+        print("\nFirst 5 rows of zipcode counts:")
+        print(zipcode_counts.head())
+
+    # Compute the Sidewalk Wellness Score
+    if verbose:
+        print("\nComputing Sidewalk Wellness Score...")
+    with stage("score", rows=len(zipcode_counts)):
+        zipcode_counts = compute_wellness_scores(zipcode_counts)
+    if verbose:
+        print("Wellness scores computed successfully.")
+        print("\nFirst 5 rows with wellness scores:")
+        print(zipcode_counts.head())
+
+    # Save processed data
+    if verbose and (output_path or parquet_output_path):
+        print("\nSaving processed data...")
+    if output_path:
+        with stage("write_csv"):
+            zipcode_counts.to_csv(output_path, index=False)
+        if verbose:
+            print(f"Data saved to '{output_path}'")
+    if parquet_output_path:
+        with stage("write_parquet"):
+            zipcode_counts.to_parquet(parquet_output_path, index=False)
+        if verbose:
+            print(f"Data saved to '{parquet_output_path}'")
+
+    # Precompute the dashboard's metrics, rankings and histogram
+    if summary_path:
+        with stage("write_summary"):
+            write_summary(zipcode_counts, summary_path)
+        if verbose:
+            print(f"Dashboard summary saved to '{summary_path}'")
+
+    # Save the counts so nightly deltas don't need the full export
+    if state_path:
+        with stage("save_state"):
+            save_count_state(zipcode_counts, state_path, applied_deltas)
+        if verbose:
+            print(f"Count state saved to '{state_path}'")
+
+    # Print summary statistics
+    if verbose:
+        print("\nSummary statistics for wellness scores:")
+        print(zipcode_counts["wellness_score"].describe())
+
+    return zipcode_counts
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Aggregate sidewalk inspections by ZIP code and compute wellness scores."
+    )
+    parser.add_argument(
+        "--input", default=RAW_DATA_PATH, help="Raw lot info CSV export"
+    )
+    parser.add_argument("--output", default=OUTPUT_PATH, help="Wellness scores CSV")
+    parser.add_argument(
+        "--parquet-output",
+        default=PARQUET_OUTPUT_PATH,
+        help="Typed columnar copy of the wellness scores read by later stages",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read the export in fixed-size chunks to keep memory bounded",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=DEFAULT_CHUNKSIZE,
+        help="Rows per chunk in streaming and parallel modes",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes to count byte ranges of the export in parallel",
+    )
+    parser.add_argument(
+        "--spatial",
+        action="store_true",
+        help="Assign lots to ZIP polygons by location instead of their ZIP string",
+    )
+    parser.add_argument(
+        "--centroids",
+        default=CENTROIDS_PATH,
+        help="BBL to lat/lon centroid CSV, used when the export has no coordinates",
+    )
+    parser.add_argument(
+        "--zipcodes", default=ZIPCODES_PATH, help="ZIP code boundaries for --spatial"
+    )
+    parser.add_argument(
+        "--state", default=STATE_PATH, help="Per-ZIP count state file for deltas"
+    )
+    parser.add_argument(
+        "--summary",
+        default=SUMMARY_PATH,
+        help="Precomputed metrics, rankings and histogram for the dashboard",
+    )
+    parser.add_argument(
+        "--delta",
+        help="Apply a delta CSV of added/removed lots to the saved state "
+        "instead of reprocessing the full export",
+    )
+    parser.add_argument(
+        "--snapshot",
+        action="store_true",
+        help="Also store the scores in the dated snapshot history",
+    )
+    parser.add_argument(
+        "--snapshot-date",
+        type=parse_snapshot_date,
+        help="Snapshot date (YYYY-MM-DD); defaults to the date in the name of "
+        "the export, or of the delta file with --delta",
+    )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="Skip progress output and the diagnostic full-table scans",
+    )
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    # Delta-updated scores are as of the delta, not of the full export
+    dated_path = args.delta or args.input
+    snapshot_date = args.snapshot_date or snapshot_date_from_path(dated_path)
+    if args.snapshot and snapshot_date is None:
+        parser.error(
+            f"--snapshot needs --snapshot-date, as '{dated_path}' has no date "
+            "in its name"
+        )
+
+    with recording_from_args(args):
+        zipcode_counts = run_cleaning(
+            input_path=args.input,
+            output_path=args.output,
+            parquet_output_path=args.parquet_output,
+            state_path=args.state,
+            summary_path=args.summary,
+            stream=args.stream,
+            chunksize=args.chunksize,
+            workers=args.workers,
+            spatial=args.spatial,
+            centroids_path=args.centroids,
+            zipcodes_path=args.zipcodes,
+            delta_path=args.delta,
+            verbose=not args.quiet,
+        )
+
+        if args.snapshot:
+            with stage("snapshot"):
+                stored = add_snapshot(zipcode_counts, snapshot_date)
+            if stored:
+                print(f"Stored the scores as snapshot {snapshot_date}.")
+            else:
+                print(f"Snapshot {snapshot_date} already exists; not overwritten.")
+
 
-# Group by zipcode and count inspections
-print("\nAggregating data by zipcode...")
-# Clean the zipcode column - extract just the 5-digit ZIP code
-df["zipcode"] = df["zipcode"].str.extract(r"(\d{5})", expand=False)
-# Drop rows with missing zipcodes
-df = df.dropna(subset=["zipcode"])
-print(f"After cleaning zipcode, dataset shape: {df.shape}")
-
-zipcode_counts = df.groupby("zipcode").size().reset_index(name="inspection_count")
-print("Data aggregated successfully.")
-print("\nFirst 5 rows of zipcode counts:")
-print(zipcode_counts.head())
-
-# Compute the Sidewalk Wellness Score
-print("\nComputing Sidewalk Wellness Score...")
-max_count = zipcode_counts["inspection_count"].max()
-zipcode_counts["wellness_score"] = (
-    1 - (zipcode_counts["inspection_count"] / max_count)
-) * 100
-print("Wellness scores computed successfully.")
-print("\nFirst 5 rows with wellness scores:")
-print(zipcode_counts.head())
-
-# Save processed data to CSV
-print("\nSaving processed data...")
-zipcode_counts.to_csv("data/wellness_scores.csv", index=False)
-print("Data saved to 'data/wellness_scores.csv'")
-
-# Print summary statistics
-print("\nSummary statistics for wellness scores:")
-print(zipcode_counts["wellness_score"].describe())
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+import codecs
+import json
+import mmap
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import shapely
+
+# Features handled per batch when writing and reading; memory use is bounded
+# by the batch, not by the size of the file
+DEFAULT_BATCH_SIZE = 10_000
+
+# Paths with these extensions hold one feature per line and no collection
+NDJSON_EXTENSIONS = (".ndjson", ".geojsonl", ".geojsons")
+
+# A line holding a whole feature, as written here, by GDAL or as NDJSON
+FEATURE_LINE = re.compile(rb'\{\s*"type"\s*:\s*"Feature"\s*,')
+FEATURES_MEMBER = re.compile(rb'"features"\s*:\s*\[')
+# The named CRS of a pre-RFC 7946 file, which GDAL still writes
+CRS_MEMBER = re.compile(
+    rb'"crs"\s*:\s*\{\s*"type"\s*:\s*"name"\s*,\s*"properties"\s*:\s*'
+    rb'\{\s*"name"\s*:\s*"([^"]+)"'
+)
+SEPARATORS = re.compile(r"[\s,]*")
+
+# Bytes decoded at a time when scanning files without one feature per line
+SCAN_BLOCK_SIZE = 1 << 20
+# Mapped pages already read are dropped from resident memory this often, so
+# reading a file many times larger than RAM keeps a flat footprint
+RELEASE_INTERVAL = 64 << 20
+
+GEOJSON_CRS = "EPSG:4326"
+
+
+def is_ndjson(path):
+    """Whether a path names a newline-delimited GeoJSON file."""
+    return path.lower().endswith(NDJSON_EXTENSIONS)
+
+
+def declared_crs(path):
+    """The CRS named in a file's legacy `crs` member, or WGS84 as RFC 7946 has it."""
+    with open(path, "rb") as f:
+        head = f.read(SCAN_BLOCK_SIZE)
+    features = FEATURES_MEMBER.search(head)
+    match = CRS_MEMBER.search(head, 0, features.start() if features else len(head))
+    return match.group(1).decode() if match else GEOJSON_CRS
+
+
+def round_coordinates(geometries, precision):
+    """Round the coordinates of an array of geometries to `precision` decimals."""
+    return shapely.transform(geometries, lambda coords: np.round(coords, precision))
+
+
+def feature_texts(geo_df, precision=None):
+    """
+    Serialize a GeoDataFrame's rows as GeoJSON Feature strings.
+
+    Properties are serialized by pandas and geometries by GEOS, each over the
+    whole frame at once, so there is no per-feature Python work besides
+    joining the two. With `precision`, coordinates are rounded to that many
+    decimals (5 is about 1 m), which shrinks files and speeds up reading.
+    """
+    geometries = geo_df.geometry.values
+    if geo_df.crs is not None and not geo_df.crs.equals(GEOJSON_CRS):
+        geometries = geometries.to_crs(GEOJSON_CRS)
+    geometries = np.asarray(geometries, dtype=object)
+    if precision is not None:
+        geometries = round_coordinates(geometries, precision)
+    geometry_texts = shapely.to_geojson(geometries)
+
+    properties = geo_df.drop(columns=geo_df.geometry.name)
+    if len(properties.columns):
+        property_texts = properties.to_json(
+            orient="records", lines=True, double_precision=15, date_format="iso"
+        ).splitlines()
+    else:
+        property_texts = ["{}"] * len(geo_df)
+
+    return [
+        f'{{"type":"Feature","properties":{props},"geometry":{geometry or "null"}}}'
+        for props, geometry in zip(property_texts, geometry_texts)
+    ]
+
+
+def write_geojson(geo_df, path, precision=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Write a GeoDataFrame as GeoJSON, or NDJSON for .ndjson/.geojsonl paths.
+
+    Features are serialized and written a batch at a time, one per line, so
+    `read_geojson` can stream the file back. The file is written next to its
+    destination and moved into place once complete. Returns the number of
+    features written.
+    """
+    ndjson = is_ndjson(path)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        if not ndjson:
+            f.write('{"type":"FeatureCollection","features":[\n')
+        for start in range(0, len(geo_df), batch_size):
+            texts = feature_texts(geo_df.iloc[start : start + batch_size], precision)
+            separator = "\n" if ndjson else ",\n"
+            if start and not ndjson:
+                f.write(separator)
+            f.write(separator.join(texts))
+        f.write("\n" if ndjson else "\n]}\n")
+    os.replace(path + ".tmp", path)
+    return len(geo_df)
+
+
+def _iter_lines(buffer):
+    """Feature lines of a file laid out one feature per line, else None."""
+    first = FEATURE_LINE.search(buffer, 0, SCAN_BLOCK_SIZE)
+    if first is None:
+        return None
+    line_start = buffer.rfind(b"\n", 0, first.start()) + 1
+    if buffer[line_start : first.start()].strip():
+        # The feature shares its line with the collection header
+        return None
+    line_end = buffer.find(b"\n", first.start())
+    try:
+        json.loads(
+            buffer[line_start : len(buffer) if line_end < 0 else line_end]
+            .rstrip()
+            .rstrip(b",")
+        )
+    except json.JSONDecodeError:
+        # Features are spread over several lines
+        return None
+    buffer.seek(line_start)
+    return _feature_lines(buffer)
+
+
+def _release_pages(buffer, end):
+    """Drop the mapped pages before `end` from the process's resident memory."""
+    advice = getattr(mmap, "MADV_DONTNEED", None)
+    end -= end % mmap.PAGESIZE
+    if advice is not None and end > 0:
+        buffer.madvise(advice, 0, end)
+
+
+def _feature_lines(buffer):
+    # Every non-empty line up to the end of the features array is a feature,
+    # whatever the order of its members; one that isn't valid JSON fails
+    # when the batch is parsed rather than being skipped
+    released = 0
+    for line in iter(buffer.readline, b""):
+        if buffer.tell() - released > RELEASE_INTERVAL:
+            released = buffer.tell()
+            _release_pages(buffer, released)
+        line = line.strip().rstrip(b",")
+        if not line:
+            continue
+        if line.startswith(b"]"):
+            # The rest is the collection's footer
+            return
+        yield line.decode("utf-8")
+
+
+def _iter_scanned(buffer, ndjson):
+    """
+    Feature strings of a file with any layout, decoding it a block at a time.
+
+    Features are found by decoding JSON values one after another from the
+    start of the `features` array, so a minified or pretty-printed file
+    streams too, only more slowly than one laid out a feature per line.
+    """
+    if ndjson:
+        position = 0
+    else:
+        match = FEATURES_MEMBER.search(buffer)
+        if match is None:
+            return
+        position = match.end()
+
+    decoder = json.JSONDecoder()
+    # Blocks can end inside a multi-byte character, which the incremental
+    # decoder holds back until the next block
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    text, index = "", 0
+    while True:
+        index = SEPARATORS.match(text, index).end()
+        if text.startswith("]", index):
+            return
+        try:
+            feature, end = decoder.raw_decode(text, index)
+        except json.JSONDecodeError:
+            # The next feature runs past the decoded text; decode more
+            if position >= len(buffer):
+                if text[index:].strip():
+                    raise
+                return
+            block = buffer[position : position + SCAN_BLOCK_SIZE]
+            position += len(block)
+            if position % RELEASE_INTERVAL < SCAN_BLOCK_SIZE:
+                _release_pages(buffer, position - len(block))
+            text = text[index:] + utf8.decode(block, final=not block)
+            index = 0
+            continue
+        yield text[index:end]
+        index = end
+
+
+def iter_feature_texts(path):
+    """
+    Stream the features of a GeoJSON or NDJSON file as JSON strings.
+
+    The file is memory-mapped, so the OS pages it in as it is read and the
+    process never holds more than the current feature. Files with one
+    feature per line are split on newlines; others are scanned.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            lines = _iter_lines(buffer)
+            if lines is None:
+                lines = _iter_scanned(buffer, is_ndjson(path))
+            yield from lines
+
+
+def _split_feature(text):
+    """
+    Split a feature string into its properties and geometry strings.
+
+    Only features whose geometry is the last member, as written here and by
+    GDAL, can be split; returns None for others.
+    """
+    start = text.rfind('"geometry"')
+    if start < 0:
+        return None
+    head = text[:start].rstrip()
+    geometry = text[start + len('"geometry"') :].lstrip()
+    if not (head.endswith(",") and geometry.startswith(":") and text.endswith("}")):
+        return None
+    try:
+        feature = json.loads(head[:-1] + "}")
+    except json.JSONDecodeError:
+        return None
+    if feature.get("type") != "Feature" or "properties" not in feature:
+        return None
+    return feature["properties"] or {}, geometry[1:-1].strip()
+
+
+def features_to_frame(texts, columns=None, crs=GEOJSON_CRS):
+    """
+    Build a GeoDataFrame from a batch of feature strings.
+
+    Geometries are parsed by GEOS in one vectorized call on the geometry
+    part of each feature, so coordinates never become Python floats; only
+    the properties go through `json`.
+    """
+    import geopandas as gpd
+
+    split = [_split_feature(text) for text in texts]
+    try:
+        if any(part is None for part in split):
+            raise ValueError("Some features can't be split")
+        properties = [part[0] for part in split]
+        geometry_texts = np.array([part[1] for part in split], dtype=object)
+        geometries = np.full(len(texts), None, dtype=object)
+        present = geometry_texts != "null"
+        geometries[present] = shapely.from_geojson(geometry_texts[present])
+    except (ValueError, shapely.errors.GEOSException):
+        # Features with other members after the geometry are parsed whole
+        features = [json.loads(text) for text in texts]
+        for feature in features:
+            if not isinstance(feature, dict) or feature.get("type") != "Feature":
+                raise ValueError(f"Not a GeoJSON Feature: {json.dumps(feature)[:80]}")
+        properties = [feature.get("properties") or {} for feature in features]
+        geometries = np.array(
+            [
+                (
+                    shapely.from_geojson(json.dumps(feature["geometry"]))
+                    if feature.get("geometry")
+                    else None
+                )
+                for feature in features
+            ],
+            dtype=object,
+        )
+
+    frame = pd.DataFrame.from_records(properties, columns=columns)
+    return gpd.GeoDataFrame(frame, geometry=geometries, crs=crs)
+
+
+def iter_geojson(path, columns=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Stream a GeoJSON or NDJSON file as GeoDataFrames of `batch_size` rows."""
+    crs = declared_crs(path)
+    batch = []
+    for text in iter_feature_texts(path):
+        batch.append(text)
+        if len(batch) == batch_size:
+            yield features_to_frame(batch, columns, crs)
+            batch = []
+    if batch:
+        yield features_to_frame(batch, columns, crs)
+
+
+def read_geojson(path, columns=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Read a GeoJSON or NDJSON file into a GeoDataFrame without GDAL.
+
+    The file is streamed in batches, so beyond the result itself memory
+    stays bounded by the batch size. With `columns`, only those properties
+    are kept. Coordinates are WGS84 lon/lat, as GeoJSON requires, unless
+    the file names another CRS in a legacy `crs` member.
+    """
+    import geopandas as gpd
+
+    batches = list(iter_geojson(path, columns, batch_size))
+    if not batches:
+        return gpd.GeoDataFrame(
+            columns=(columns or []) + ["geometry"],
+            geometry="geometry",
+            crs=declared_crs(path),
+        )
+    return pd.concat(batches, ignore_index=True)
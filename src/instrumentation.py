@@ -0,0 +1,268 @@
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+REPORT_PATH = "data/timing_report.json"
+PROFILERS = ["cprofile", "pyinstrument"]
+
+# The recorder of the current run, per thread, so concurrent dashboard
+# sessions don't share timings; None means instrumentation is off
+_active = ContextVar("recorder", default=None)
+
+
+def peak_rss_bytes():
+    """
+    Peak resident memory of the process since the last reset.
+
+    Reads VmHWM on Linux, which `reset_peak_rss` can reset per stage, and
+    falls back to the lifetime peak from getrusage elsewhere.
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def reset_peak_rss():
+    """Reset the process's VmHWM to its current RSS, where Linux allows it."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+class _NullStage:
+    """Stand-in returned by `stage` while instrumentation is off."""
+
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """One timed block; set `rows` inside it to record how many it handled."""
+
+    def __init__(self, recorder, name, rows):
+        self.recorder = recorder
+        self.name = name
+        self.rows = rows
+        self.peak = 0
+
+    def __enter__(self):
+        self.recorder.enter(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        self.recorder.exit(self, seconds)
+        return False
+
+
+class Recorder:
+    """
+    Collects the timings, row counts and peak memory of named stages.
+
+    Stages nest, and a stage entered many times, such as a per-chunk step,
+    is aggregated into one entry with its call count.
+    """
+
+    def __init__(self):
+        self.started = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.stack = []
+        self.stages = {}
+
+    def enter(self, stage):
+        # Entries are created on entry, so parents are listed before the
+        # stages nested in them
+        stage.path = "/".join(
+            [open_stage.name for open_stage in self.stack] + [stage.name]
+        )
+        self.stages.setdefault(
+            stage.path,
+            {"name": stage.path, "calls": 0, "seconds": 0.0, "rows": None, "peak": 0},
+        )
+
+        # The peak is reset for each stage, so fold the peak so far into the
+        # stages that are still open first
+        peak = peak_rss_bytes()
+        for open_stage in self.stack:
+            open_stage.peak = max(open_stage.peak, peak)
+        reset_peak_rss()
+        self.stack.append(stage)
+
+    def exit(self, stage, seconds):
+        stage.peak = max(stage.peak, peak_rss_bytes())
+        self.stack.pop()
+        if self.stack:
+            self.stack[-1].peak = max(self.stack[-1].peak, stage.peak)
+
+        entry = self.stages[stage.path]
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+        entry["peak"] = max(entry["peak"], stage.peak)
+        if stage.rows is not None:
+            entry["rows"] = (entry["rows"] or 0) + int(stage.rows)
+
+    def report(self):
+        """The recorded stages as a JSON-serializable report."""
+        return {
+            "started": self.started.isoformat(),
+            "command": sys.argv,
+            "total_seconds": round(time.perf_counter() - self.start, 4),
+            "stages": [
+                {
+                    "name": entry["name"],
+                    "calls": entry["calls"],
+                    "seconds": round(entry["seconds"], 4),
+                    "rows": entry["rows"],
+                    "peak_rss_mb": round(entry["peak"] / 2**20, 1),
+                }
+                for entry in self.stages.values()
+            ],
+        }
+
+
+def stage(name, rows=None):
+    """
+    Time a block as a named stage of the current run.
+
+    Use as `with stage("read_csv") as s: ...; s.rows = len(df)`. While no
+    recording is active this returns a shared no-op context, so leaving the
+    calls in costs a context variable lookup.
+    """
+    recorder = _active.get()
+    if recorder is None:
+        return _NULL_STAGE
+    return _Stage(recorder, name, rows)
+
+
+def timed_chunks(chunks, name="read_chunk"):
+    """
+    Iterate over a chunked reader, timing each read as a stage.
+
+    While no recording is active the reader is returned as is.
+    """
+    if _active.get() is None:
+        return chunks
+    return _timed_chunks(iter(chunks), name)
+
+
+def _timed_chunks(chunks, name):
+    while True:
+        with stage(name) as timed:
+            chunk = next(chunks, None)
+            if chunk is not None:
+                timed.rows = len(chunk)
+        if chunk is None:
+            return
+        yield chunk
+
+
+@contextmanager
+def recording(report_path=REPORT_PATH, profile_path=None, profiler="cprofile"):
+    """
+    Record the stages run inside the block, and optionally profile it.
+
+    The report is written to `report_path` as JSON unless it is None. With
+    `profile_path` the block also runs under cProfile, whose stats can be
+    read with `pstats` or snakeviz, or under pyinstrument (if installed),
+    which writes an HTML flame view.
+    """
+    if profiler not in PROFILERS:
+        raise ValueError(f"Unknown profiler '{profiler}'; choose from {PROFILERS}")
+
+    recorder = Recorder()
+    token = _active.set(recorder)
+    profile = None
+    if profile_path:
+        if profiler == "pyinstrument":
+            # pyinstrument is optional
+            from pyinstrument import Profiler
+
+            profile = Profiler()
+            profile.start()
+        else:
+            import cProfile
+
+            profile = cProfile.Profile()
+            profile.enable()
+
+    try:
+        yield recorder
+    finally:
+        if profile is not None:
+            if profiler == "pyinstrument":
+                profile.stop()
+                with open(profile_path, "w") as f:
+                    f.write(profile.output_html())
+            else:
+                profile.disable()
+                profile.dump_stats(profile_path)
+        _active.reset(token)
+
+        if report_path:
+            report = recorder.report()
+            report["profile"] = profile_path
+            with open(report_path, "w") as f:
+                json.dump(report, f, indent=2)
+
+
+def load_report(path=REPORT_PATH):
+    """Load the report written by `recording`, or None."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def add_arguments(parser):
+    """Add the --timings and --profile options to a command's parser."""
+    parser.add_argument(
+        "--timings",
+        nargs="?",
+        const=REPORT_PATH,
+        help=f"Write per-stage timings, row counts and peak memory as JSON "
+        f"(default path: {REPORT_PATH})",
+    )
+    parser.add_argument(
+        "--profile", help="Also profile the run and write the profile to this path"
+    )
+    parser.add_argument(
+        "--profiler",
+        choices=PROFILERS,
+        default="cprofile",
+        help="Profiler for --profile; pyinstrument must be installed",
+    )
+
+
+@contextmanager
+def recording_from_args(args):
+    """Record the block if the command was run with --timings or --profile."""
+    if not (args.timings or args.profile):
+        yield None
+        return
+    report_path = args.timings or REPORT_PATH
+    with recording(report_path, args.profile, args.profiler) as recorder:
+        yield recorder
+    print(f"\nStage timings saved to '{report_path}'")
@@ -0,0 +1,319 @@
+import argparse
+import json
+import os
+
+import pandas as pd
+
+from data_cleaning import (
+    CENTROIDS_PATH,
+    DEFAULT_CHUNKSIZE,
+    OUTPUT_PATH,
+    PARQUET_OUTPUT_PATH,
+    RAW_DATA_PATH,
+    STATE_PATH,
+    SUMMARY_PATH,
+    run_cleaning,
+)
+from geo_integration import (
+    GEOJSON_OUTPUT_PATH,
+    GEOPARQUET_OUTPUT_PATH,
+    integrate_geo_data,
+)
+from instrumentation import add_arguments, recording_from_args, stage
+from rollups import ROLLUPS_PATH, build_rollups_from_outputs, write_rollups
+from scoring import DENOMINATORS_PATH, build_denominators, write_denominators
+from shared_data import artifacts_are_current, publish_artifacts
+from snapshot_store import add_snapshot, parse_snapshot_date, snapshot_date_from_path
+from zip_schema import ZIPCODES_PATH, file_hash
+
+PIPELINE_STATE_PATH = "data/pipeline_state.json"
+
+# Mirrors simplify_geometries, which isn't imported unless topojson is installed
+SIMPLIFIED_DIR = "data/geo/simplified"
+LEVELS_MANIFEST = "levels.json"
+
+
+def load_pipeline_state(path=PIPELINE_STATE_PATH):
+    """Load the recorded inputs of the last successful run of each stage."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_pipeline_state(state, path=PIPELINE_STATE_PATH):
+    """Write the recorded stage inputs."""
+    with open(path, "w") as f:
+        json.dump(state, f, indent=2)
+
+
+def file_signature(path, previous=None):
+    """
+    Size, modification time and content hash of an input file.
+
+    The hash is only recomputed when the size or mtime differ from the
+    `previous` signature, so unchanged inputs cost a single `stat`.
+    """
+    stat = os.stat(path)
+    signature = {"size": stat.st_size, "mtime": stat.st_mtime}
+    if (
+        previous
+        and previous["size"] == signature["size"]
+        and previous["mtime"] == signature["mtime"]
+    ):
+        signature["sha256"] = previous["sha256"]
+    else:
+        signature["sha256"] = file_hash(path)
+    return signature
+
+
+def stage_signature(inputs, params, previous=None):
+    """Signature of a stage run: its input files and its parameters."""
+    previous_files = (previous or {}).get("files", {})
+    return {
+        "files": {
+            path: file_signature(path, previous_files.get(path)) for path in inputs
+        },
+        "params": params,
+    }
+
+
+def stage_is_current(previous, signature, outputs):
+    """
+    Whether a stage can be skipped.
+
+    It can when its outputs exist and its parameters and input contents are
+    the same as in its last run; touching an input without changing its
+    contents doesn't count as a change.
+    """
+    if previous is None or not all(os.path.exists(path) for path in outputs):
+        return False
+    if previous["params"] != signature["params"]:
+        return False
+    if previous["files"].keys() != signature["files"].keys():
+        return False
+    return all(
+        previous["files"][path]["sha256"] == file["sha256"]
+        for path, file in signature["files"].items()
+    )
+
+
+def run_pipeline(
+    input_path=RAW_DATA_PATH,
+    zipcodes_path=ZIPCODES_PATH,
+    spatial=False,
+    centroids_path=CENTROIDS_PATH,
+    workers=1,
+    chunksize=DEFAULT_CHUNKSIZE,
+    text_outputs=False,
+    simplify=True,
+    shared_data=True,
+    snapshot_date=None,
+    force=False,
+    verbose=False,
+    state_path=PIPELINE_STATE_PATH,
+):
+    """
+    Run cleaning and scoring, the geo merge and map simplification in one go.
+
+    Frames are handed from stage to stage in memory and only the artifacts
+    the dashboard reads are written: the scores and merged geometries as
+    Parquet/GeoParquet, the per-ZIP scoring denominators, the borough and
+    neighborhood rollups and the simplified map levels. The CSV and GeoJSON
+    copies are written too with `text_outputs`.
+
+    A stage is skipped when its inputs and parameters are unchanged since its
+    last run; a stage that runs marks every later stage that depends on it as
+    changed. Fresh scores are also appended to the snapshot history, dated by
+    `snapshot_date` or the date in the export's file name. Returns the names
+    of the stages that ran.
+    """
+    state = {} if force else load_pipeline_state(state_path)
+    ran = []
+
+    # Cleaning and scoring
+    inputs = [input_path]
+    if spatial:
+        # Exports with their own coordinates don't need the centroid table
+        inputs += [zipcodes_path] + (
+            [centroids_path] if os.path.exists(centroids_path) else []
+        )
+    params = {"spatial": spatial}
+    signature = stage_signature(inputs, params, state.get("cleaning"))
+    outputs = [PARQUET_OUTPUT_PATH, SUMMARY_PATH] + (
+        [OUTPUT_PATH] if text_outputs else []
+    )
+    wellness_df = None
+    if not stage_is_current(state.get("cleaning"), signature, outputs):
+        print(f"Cleaning and scoring '{input_path}'...")
+        with stage("cleaning"):
+            wellness_df = run_cleaning(
+                input_path=input_path,
+                output_path=OUTPUT_PATH if text_outputs else None,
+                parquet_output_path=PARQUET_OUTPUT_PATH,
+                state_path=STATE_PATH,
+                chunksize=chunksize,
+                workers=workers,
+                spatial=spatial,
+                centroids_path=centroids_path,
+                zipcodes_path=zipcodes_path,
+                verbose=verbose,
+            )
+        print(f"Scored {len(wellness_df)} ZIP codes.")
+
+        # Keep every dated export's scores in the snapshot history
+        date = snapshot_date or snapshot_date_from_path(input_path)
+        if date:
+            with stage("snapshot"):
+                stored = add_snapshot(wellness_df, date)
+            if stored:
+                print(f"Stored the scores as snapshot {date}.")
+        state["cleaning"] = signature
+        save_pipeline_state(state, state_path)
+        ran.append("cleaning")
+    else:
+        print("Cleaning: inputs unchanged, skipped.")
+
+    # Geo merge, which reruns when the scores or the boundaries changed
+    signature = stage_signature([zipcodes_path], {}, state.get("geo_integration"))
+    outputs = [GEOPARQUET_OUTPUT_PATH] + ([GEOJSON_OUTPUT_PATH] if text_outputs else [])
+    merged = None
+    if ran or not stage_is_current(state.get("geo_integration"), signature, outputs):
+        if wellness_df is None:
+            wellness_df = pd.read_parquet(PARQUET_OUTPUT_PATH)
+        print("\nMerging scores with the ZIP code boundaries...")
+        with stage("geo_integration"):
+            merged = integrate_geo_data(
+                wellness_df,
+                zipcodes_path=zipcodes_path,
+                geojson_output_path=GEOJSON_OUTPUT_PATH if text_outputs else None,
+                geoparquet_output_path=GEOPARQUET_OUTPUT_PATH,
+            )
+        state["geo_integration"] = signature
+        save_pipeline_state(state, state_path)
+        ran.append("geo_integration")
+    else:
+        print("Geo integration: inputs unchanged, skipped.")
+
+    # ZIP code areas and lot counts for the density-aware scoring formulas,
+    # which only depend on the boundaries and the centroid table
+    inputs = [zipcodes_path] + (
+        [centroids_path] if os.path.exists(centroids_path) else []
+    )
+    signature = stage_signature(inputs, {}, state.get("denominators"))
+    if not stage_is_current(state.get("denominators"), signature, [DENOMINATORS_PATH]):
+        print("\nComputing ZIP code areas and lot counts...")
+        with stage("denominators"):
+            write_denominators(build_denominators(zipcodes_path, centroids_path))
+        state["denominators"] = signature
+        save_pipeline_state(state, state_path)
+        ran.append("denominators")
+    else:
+        print("Denominators: inputs unchanged, skipped.")
+
+    # City, borough, neighborhood and ZIP code rollups for the drill-down,
+    # rebuilt with the merged data
+    if merged is not None or not os.path.exists(ROLLUPS_PATH):
+        print("\nBuilding the borough and neighborhood rollups...")
+        with stage("rollups"):
+            rollups = build_rollups_from_outputs(wellness_df, merged)
+            if rollups is not None:
+                write_rollups(rollups)
+        if rollups is not None:
+            ran.append("rollups")
+
+    # Memory-mapped copies of the scores and geometries, which every
+    # dashboard process on the host shares, republished when either changed
+    if shared_data and (force or not artifacts_are_current()):
+        print("\nPublishing the shared dashboard data...")
+        with stage("shared_data"):
+            publish_artifacts(wellness_df, merged)
+        ran.append("shared_data")
+
+    # Simplified map levels for the dashboard, rebuilt with the merged data
+    levels_path = os.path.join(SIMPLIFIED_DIR, LEVELS_MANIFEST)
+    if simplify and (merged is not None or not os.path.exists(levels_path)):
+        try:
+            # topojson is optional
+            from simplify_geometries import build_simplified_levels
+        except ImportError:
+            print("\ntopojson is not installed; skipping simplified map levels.")
+        else:
+            print("\nBuilding simplified map levels...")
+            with stage("simplify_geometries"):
+                build_simplified_levels(geo_df=merged)
+            ran.append("simplify_geometries")
+
+    print(f"\nPipeline finished; ran {', '.join(ran) if ran else 'nothing'}.")
+    return ran
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Refresh every dashboard artifact, skipping unchanged stages."
+    )
+    parser.add_argument(
+        "--input", default=RAW_DATA_PATH, help="Raw lot info CSV export"
+    )
+    parser.add_argument(
+        "--zipcodes", default=ZIPCODES_PATH, help="ZIP code boundary GeoJSON"
+    )
+    parser.add_argument(
+        "--spatial",
+        action="store_true",
+        help="Assign lots to ZIP polygons by location instead of their ZIP string",
+    )
+    parser.add_argument(
+        "--centroids", default=CENTROIDS_PATH, help="BBL to lat/lon centroid CSV"
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument(
+        "--text-outputs",
+        action="store_true",
+        help="Also write the scores CSV and merged GeoJSON",
+    )
+    parser.add_argument(
+        "--no-simplify",
+        action="store_true",
+        help="Don't rebuild the simplified map levels",
+    )
+    parser.add_argument(
+        "--no-shared-data",
+        action="store_true",
+        help="Don't publish the memory-mapped data shared by dashboard processes",
+    )
+    parser.add_argument(
+        "--snapshot-date",
+        type=parse_snapshot_date,
+        help="Date to store the scores under (YYYY-MM-DD); defaults to the "
+        "date in the export's name",
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Rerun every stage regardless of inputs"
+    )
+    parser.add_argument(
+        "--verbose", action="store_true", help="Show the cleaning diagnostics"
+    )
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with recording_from_args(args):
+        run_pipeline(
+            input_path=args.input,
+            zipcodes_path=args.zipcodes,
+            spatial=args.spatial,
+            centroids_path=args.centroids,
+            workers=args.workers,
+            chunksize=args.chunksize,
+            text_outputs=args.text_outputs,
+            simplify=not args.no_simplify,
+            shared_data=not args.no_shared_data,
+            snapshot_date=args.snapshot_date,
+            force=args.force,
+            verbose=args.verbose,
+        )
+
+
+if __name__ == "__main__":
+    main()
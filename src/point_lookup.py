@@ -0,0 +1,260 @@
+import argparse
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from geo_integration import WELLNESS_CSV_PATH, WELLNESS_PARQUET_PATH
+from scoring import DEFAULT_FORMULA, FORMULAS, load_denominators, score_counts
+from spatial_index import PolygonIndex
+from zip_codes import (
+    MISSING_ZIP,
+    ZIP_DTYPE,
+    parse_zipcodes,
+    zip_categorical,
+    zip_positions,
+)
+from zip_schema import ZIPCODES_PATH, file_hash, read_zip_boundaries, resolve_zip_schema
+
+# The ZIP polygon STRtree, pickled with the hash of the boundary file it was
+# built from, so later runs skip reading the GeoJSON (and importing geopandas)
+LOOKUP_INDEX_PATH = "data/geo/zip_lookup_index.pkl"
+DEFAULT_CHUNKSIZE = 250_000
+LATITUDE_COLUMN = "latitude"
+LONGITUDE_COLUMN = "longitude"
+
+
+def build_zip_index(zipcodes_path=ZIPCODES_PATH):
+    """Build the STRtree over the ZIP polygons and the uint32 ZIP code of each."""
+    schema = resolve_zip_schema(zipcodes_path)
+    if schema is None:
+        raise ValueError(f"Couldn't identify the ZIP code field of '{zipcodes_path}'.")
+    boundaries = read_zip_boundaries(zipcodes_path, schema, columns=[])
+    boundaries = boundaries.to_crs("EPSG:4326")
+    polygon_zips = parse_zipcodes(boundaries[schema["zip_field"]])
+    return PolygonIndex(boundaries.geometry.values), polygon_zips
+
+
+def load_zip_index(zipcodes_path=ZIPCODES_PATH, cache_path=LOOKUP_INDEX_PATH):
+    """
+    Load the ZIP polygon index from its disk cache, rebuilding it if stale.
+
+    Returns the `PolygonIndex` and a uint32 array with the ZIP code of each
+    polygon (`MISSING_ZIP` where it has none). The cache is rebuilt whenever
+    the boundary file's content hash differs from the one it was built from;
+    `cache_path=None` skips it.
+    """
+    source_hash = file_hash(zipcodes_path)
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, "rb") as f:
+            cached = pickle.load(f)
+        if (
+            cached["source_hash"] == source_hash
+            and cached["polygon_zips"].dtype == ZIP_DTYPE
+        ):
+            return cached["index"], cached["polygon_zips"]
+
+    index, polygon_zips = build_zip_index(zipcodes_path)
+    if cache_path:
+        with open(cache_path + ".tmp", "wb") as f:
+            pickle.dump(
+                {
+                    "source_hash": source_hash,
+                    "index": index,
+                    "polygon_zips": polygon_zips,
+                },
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(cache_path + ".tmp", cache_path)
+    return index, polygon_zips
+
+
+def load_scores(formula=DEFAULT_FORMULA):
+    """Wellness scores under a formula, indexed by ZIP code."""
+    if os.path.exists(WELLNESS_PARQUET_PATH):
+        scores = pd.read_parquet(WELLNESS_PARQUET_PATH)
+    else:
+        scores = pd.read_csv(WELLNESS_CSV_PATH, dtype={"zipcode": str})
+    if formula != DEFAULT_FORMULA:
+        scores = scores.assign(
+            wellness_score=score_counts(scores, formula, load_denominators())
+        )
+    return scores.set_index("zipcode")[["inspection_count", "wellness_score"]]
+
+
+class ZipLookup:
+    """
+    Score batches of points against the ZIP polygons.
+
+    The polygon index and the scores are loaded once; each batch is then
+    assigned with a single bulk STRtree query and a vectorized join, with no
+    per-point Python work.
+    """
+
+    def __init__(
+        self,
+        zipcodes_path=ZIPCODES_PATH,
+        formula=DEFAULT_FORMULA,
+        cache_path=LOOKUP_INDEX_PATH,
+    ):
+        self.index, polygon_zips = load_zip_index(zipcodes_path, cache_path)
+        scores = load_scores(formula)
+
+        # Per-polygon ZIP codes and scores, so a batch is scored by indexing
+        # with the polygon numbers; the extra last row is for unmatched points
+        positions = zip_positions(polygon_zips, parse_zipcodes(scores.index))
+        found = positions >= 0
+        self.zipcodes = np.append(polygon_zips, MISSING_ZIP).astype(ZIP_DTYPE)
+        self.counts = np.full(len(polygon_zips) + 1, np.nan)
+        self.counts[:-1][found] = scores["inspection_count"].to_numpy()[
+            positions[found]
+        ]
+        self.scores = np.full(len(polygon_zips) + 1, np.nan)
+        self.scores[:-1][found] = scores["wellness_score"].to_numpy()[positions[found]]
+
+    def lookup(self, lats, lons):
+        """
+        ZIP code, inspection count and wellness score of each point.
+
+        Points outside every ZIP polygon, or with missing coordinates, get
+        missing values. Returns a frame aligned with the input arrays, whose
+        ZIP codes are categorical, so a batch of millions of points holds
+        small integer codes rather than a string per point.
+        """
+        polygons = self.index.assign(lons, lats)
+        return pd.DataFrame(
+            {
+                "zipcode": zip_categorical(self.zipcodes[polygons], self.zipcodes),
+                "inspection_count": pd.array(self.counts[polygons]).astype("Int64"),
+                "wellness_score": self.scores[polygons],
+            }
+        )
+
+
+def lookup_points(lats, lons, zipcodes_path=ZIPCODES_PATH, formula=DEFAULT_FORMULA):
+    """Look up the ZIP code and wellness score of arrays of points."""
+    return ZipLookup(zipcodes_path, formula).lookup(lats, lons)
+
+
+def iter_point_chunks(path, chunksize=DEFAULT_CHUNKSIZE, numeric_columns=()):
+    """
+    Stream a CSV or Parquet file of points as frames of `chunksize` rows.
+
+    CSV columns other than `numeric_columns` are read as strings, so their
+    type can't change from one chunk to the next, as it would when a sparse
+    column is empty in the first chunk and inferred as float.
+    """
+    if path.endswith(".parquet"):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        header = pd.read_csv(path, nrows=0).columns
+        dtypes = {column: str for column in header if column not in numeric_columns}
+        yield from pd.read_csv(path, chunksize=chunksize, dtype=dtypes)
+
+
+def lookup_file(
+    input_path,
+    output_path,
+    lat_column=LATITUDE_COLUMN,
+    lon_column=LONGITUDE_COLUMN,
+    chunksize=DEFAULT_CHUNKSIZE,
+    lookup=None,
+):
+    """
+    Score every point in a CSV or Parquet file, streaming it in chunks.
+
+    Each chunk is written to `output_path` (CSV, or Parquet row groups for a
+    .parquet path) with its ZIP code, inspection count and wellness score
+    columns added, so memory stays bounded by the chunk size however many
+    points the file holds. Returns the number of points and how many of them
+    fell in a ZIP code.
+    """
+    lookup = lookup or ZipLookup()
+    points = matched = 0
+    writer = None
+    chunks = iter_point_chunks(input_path, chunksize, (lat_column, lon_column))
+    for i, chunk in enumerate(chunks):
+        lats = pd.to_numeric(chunk[lat_column], errors="coerce").to_numpy(float)
+        lons = pd.to_numeric(chunk[lon_column], errors="coerce").to_numpy(float)
+        result = lookup.lookup(lats, lons)
+        result.index = chunk.index
+        # Columns of an earlier lookup are replaced rather than duplicated
+        chunk = pd.concat(
+            [chunk.drop(columns=result.columns, errors="ignore"), result], axis=1
+        )
+
+        # Parquet is several times faster to write than CSV for large outputs
+        if output_path.endswith(".parquet"):
+            # Coordinates are stored as the numbers they were looked up as
+            chunk[lat_column] = lats
+            chunk[lon_column] = lons
+            if writer is None:
+                # Columns that are empty in the first chunk would be typed
+                # as null; they hold strings, as every passthrough CSV column
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                for position, field in enumerate(schema):
+                    if pa.types.is_null(field.type):
+                        schema = schema.set(position, field.with_type(pa.string()))
+                writer = pq.ParquetWriter(output_path, schema)
+            writer.write_table(
+                pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+            )
+        else:
+            chunk.to_csv(
+                output_path, mode="w" if i == 0 else "a", header=i == 0, index=False
+            )
+        points += len(chunk)
+        matched += int(result["zipcode"].notna().sum())
+
+    if writer is not None:
+        writer.close()
+    return points, matched
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Look up the ZIP code and wellness score of lat/lon points."
+    )
+    parser.add_argument("input", help="CSV or Parquet file of points")
+    parser.add_argument(
+        "--output",
+        help="Scored CSV or Parquet file; defaults to the input name with a "
+        "_scored suffix",
+    )
+    parser.add_argument("--lat-column", default=LATITUDE_COLUMN)
+    parser.add_argument("--lon-column", default=LONGITUDE_COLUMN)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument(
+        "--zipcodes", default=ZIPCODES_PATH, help="ZIP code boundary GeoJSON"
+    )
+    parser.add_argument(
+        "--formula",
+        default=DEFAULT_FORMULA,
+        choices=list(FORMULAS),
+        help="Scoring formula of the returned scores",
+    )
+    args = parser.parse_args()
+
+    root, extension = os.path.splitext(args.input)
+    output_path = args.output or f"{root}_scored{extension}"
+    lookup = ZipLookup(args.zipcodes, args.formula)
+    print(f"Scoring the points in '{args.input}'...")
+    points, matched = lookup_file(
+        args.input,
+        output_path,
+        args.lat_column,
+        args.lon_column,
+        args.chunksize,
+        lookup,
+    )
+    print(f"Placed {matched} of {points} points in a ZIP code.")
+    print(f"Scored points saved to '{output_path}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import argparse
+import json
+import os
+
+import pandas as pd
+
+from geo_integration import (
+    GEOJSON_OUTPUT_PATH,
+    GEOPARQUET_OUTPUT_PATH,
+    WELLNESS_CSV_PATH,
+    WELLNESS_PARQUET_PATH,
+)
+from sketches import ScoreSketch
+from summary import build_summary
+
+ROLLUPS_PATH = "data/wellness_rollups.json"
+
+# Levels of the drill-down, from the whole city down to single ZIP codes
+LEVELS = ["city", "borough", "neighborhood", "zip"]
+CITY_NAME = "New York City"
+# Node ids are the names along the path from the city, joined by this
+PATH_SEPARATOR = "/"
+
+# Boundary fields holding each ZIP code's borough and neighborhood (the
+# USPS post office name in the NYC file), tried in order
+BOROUGH_FIELDS = ["borough", "BOROUGH", "boro_name", "BoroName"]
+NEIGHBORHOOD_FIELDS = ["PO_NAME", "po_name", "neighborhood", "NTAName"]
+# Borough and neighborhood of ZIP codes the boundary file doesn't place
+UNASSIGNED = "Unassigned"
+
+# Score columns kept in the rankings and ZIP code records
+RECORD_COLUMNS = ["zipcode", "inspection_count", "wellness_score"]
+
+
+def node_id(*names):
+    """Id of the node at the end of a path of names below the city."""
+    return PATH_SEPARATOR.join((CITY_NAME,) + names)
+
+
+def zip_geography(geo_df):
+    """
+    Borough and neighborhood of each ZIP code in a boundary GeoDataFrame.
+
+    Returns a frame indexed by 5-digit ZIP code. A ZIP code drawn as several
+    polygons is placed by its first one, so it is counted once; fields the
+    file doesn't have come back as `UNASSIGNED`.
+    """
+    geography = pd.DataFrame(index=geo_df.index)
+    for level, fields in [
+        ("borough", BOROUGH_FIELDS),
+        ("neighborhood", NEIGHBORHOOD_FIELDS),
+    ]:
+        field = next((field for field in fields if field in geo_df.columns), None)
+        values = geo_df[field] if field else pd.Series(UNASSIGNED, geo_df.index)
+        names = values.astype("string").str.strip()
+        geography[level] = names.mask(names.eq(""), pd.NA).fillna(UNASSIGNED)
+    geography.index = geo_df["zipcode"].to_numpy()
+    geography = geography[geography.index.notna()]
+    return geography[~geography.index.duplicated()].astype(object)
+
+
+def _node(level, name, parent):
+    return {"level": level, "name": name, "parent": parent, "children": []}
+
+
+def _summarize(node, rows, sketch):
+    node["inspection_count"] = int(rows["inspection_count"].sum())
+    node.update(build_summary(rows[RECORD_COLUMNS], sketch))
+
+
+def _rank(rank):
+    return None if pd.isna(rank) else int(rank)
+
+
+def build_rollups(wellness_df, geography):
+    """
+    Precompute the city, borough, neighborhood and ZIP code rollups.
+
+    Every node of the hierarchy holds what the dashboard shows for it: ZIP
+    code and inspection counts, the score statistics and quantiles, the
+    histogram and the top and bottom rankings, as built by `build_summary`.
+    ZIP code nodes hold their scores and ranks within their borough and the
+    city. Every node also keeps its `ScoreSketch`; each level's sketch is
+    merged from its children's, so no level rescans the scores for its
+    distribution. Nodes are keyed by id (see `node_id`) and list their
+    children's ids, so drilling down is a dictionary lookup per level.
+    `geography` is indexed by ZIP code, as returned by `zip_geography`.
+    """
+    scores = wellness_df[RECORD_COLUMNS].reset_index(drop=True)
+    placed = geography.reindex(scores["zipcode"].to_numpy())
+    scores["borough"] = placed["borough"].fillna(UNASSIGNED).to_numpy()
+    scores["neighborhood"] = placed["neighborhood"].fillna(UNASSIGNED).to_numpy()
+    # Rank 1 is the highest score; ties share the best rank
+    scores["city_rank"] = scores["wellness_score"].rank(ascending=False, method="min")
+    scores["borough_rank"] = scores.groupby("borough")["wellness_score"].rank(
+        ascending=False, method="min"
+    )
+
+    root = node_id()
+    nodes = {root: _node("city", CITY_NAME, None)}
+    city_sketch = ScoreSketch()
+    for borough, borough_rows in scores.groupby("borough", sort=True):
+        borough_id = node_id(borough)
+        nodes[root]["children"].append(borough_id)
+        nodes[borough_id] = _node("borough", borough, root)
+        borough_sketch = ScoreSketch()
+
+        for neighborhood, rows in borough_rows.groupby("neighborhood", sort=True):
+            neighborhood_id = node_id(borough, neighborhood)
+            nodes[borough_id]["children"].append(neighborhood_id)
+            nodes[neighborhood_id] = _node("neighborhood", neighborhood, borough_id)
+            neighborhood_sketch = ScoreSketch()
+
+            for row in rows.sort_values("zipcode").itertuples(index=False):
+                zip_id = node_id(borough, neighborhood, row.zipcode)
+                zip_sketch = ScoreSketch.from_values([row.wellness_score])
+                neighborhood_sketch.merge(zip_sketch)
+                nodes[neighborhood_id]["children"].append(zip_id)
+                nodes[zip_id] = {
+                    "level": "zip",
+                    "name": row.zipcode,
+                    "parent": neighborhood_id,
+                    "children": [],
+                    "sketch": zip_sketch.to_dict(),
+                    "record": {
+                        "zipcode": row.zipcode,
+                        "inspection_count": int(row.inspection_count),
+                        "wellness_score": float(row.wellness_score),
+                    },
+                    # ZIP codes a formula can't score aren't ranked
+                    "rank": {
+                        "borough": _rank(row.borough_rank),
+                        "city": _rank(row.city_rank),
+                    },
+                }
+
+            _summarize(nodes[neighborhood_id], rows, neighborhood_sketch)
+            borough_sketch.merge(neighborhood_sketch)
+
+        _summarize(nodes[borough_id], borough_rows, borough_sketch)
+        city_sketch.merge(borough_sketch)
+
+    _summarize(nodes[root], scores, city_sketch)
+
+    return {
+        "levels": LEVELS,
+        "root": root,
+        "nodes": nodes,
+        # Kept so the rollups can be rebuilt for another scoring formula
+        # without reading the boundaries again
+        "geography": {
+            zipcode: [row.borough, row.neighborhood]
+            for zipcode, row in geography.iterrows()
+        },
+    }
+
+
+def geography_from_rollups(rollups):
+    """The ZIP code geography stored in a rollup cube, as `zip_geography` has it."""
+    return pd.DataFrame.from_dict(
+        rollups["geography"], orient="index", columns=["borough", "neighborhood"]
+    )
+
+
+def write_rollups(rollups, path=ROLLUPS_PATH):
+    """Write a rollup cube."""
+    with open(path + ".tmp", "w") as f:
+        json.dump(rollups, f)
+    os.replace(path + ".tmp", path)
+
+
+def load_rollups(path=ROLLUPS_PATH):
+    """Load the rollup cube written by `write_rollups`."""
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def build_rollups_from_outputs(wellness_df=None, geo_df=None):
+    """
+    Build the rollups, reading whichever inputs aren't passed in.
+
+    The scores come from the cleaning outputs and the geography from the
+    merged boundaries. Returns None when there are no merged boundaries.
+    """
+    if wellness_df is None:
+        if os.path.exists(WELLNESS_PARQUET_PATH):
+            wellness_df = pd.read_parquet(WELLNESS_PARQUET_PATH)
+        else:
+            wellness_df = pd.read_csv(WELLNESS_CSV_PATH, dtype={"zipcode": str})
+    if geo_df is None:
+        columns = ["zipcode"] + BOROUGH_FIELDS + NEIGHBORHOOD_FIELDS
+        if os.path.exists(GEOPARQUET_OUTPUT_PATH):
+            import pyarrow.parquet as pq
+
+            available = pq.read_schema(GEOPARQUET_OUTPUT_PATH).names
+            geo_df = pd.read_parquet(
+                GEOPARQUET_OUTPUT_PATH,
+                columns=[column for column in columns if column in available],
+            )
+        elif os.path.exists(GEOJSON_OUTPUT_PATH):
+            from geojson_io import read_geojson
+
+            geo_df = read_geojson(GEOJSON_OUTPUT_PATH)
+        else:
+            return None
+    return build_rollups(wellness_df, zip_geography(geo_df))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Precompute the city, borough, neighborhood and ZIP code "
+        "rollups of the wellness scores."
+    )
+    parser.add_argument("--output", default=ROLLUPS_PATH)
+    args = parser.parse_args()
+
+    print("Building the wellness score rollups...")
+    rollups = build_rollups_from_outputs()
+    if rollups is None:
+        print("No merged geospatial data; run geo_integration.py first.")
+        return
+    write_rollups(rollups, args.output)
+    counts = pd.Series([node["level"] for node in rollups["nodes"].values()])
+    print(", ".join(f"{counts.eq(level).sum()} {level}" for level in LEVELS) + " nodes")
+    print(f"Saved to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
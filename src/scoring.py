@@ -0,0 +1,237 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from spatial_index import CENTROIDS_PATH, PolygonIndex, load_centroids
+from zip_codes import format_zipcodes, parse_zipcodes
+from zip_schema import ZIPCODES_PATH, read_zip_boundaries, resolve_zip_schema
+
+# Per-ZIP land area and lot counts the density-aware formulas divide by
+DENOMINATORS_PATH = "data/zip_denominators.parquet"
+
+DEFAULT_FORMULA = "max_ratio"
+
+# Robust min-max clips to these percentiles, so an outlier such as a
+# catch-all ZIP bucket doesn't squeeze every other ZIP code into a few points
+ROBUST_PERCENTILES = (5, 95)
+
+# Shape_Area of the NYC boundary files is in square feet (NY State Plane)
+SQUARE_FEET_PER_SQUARE_MILE = 5280**2
+AREA_CRS = "EPSG:2263"
+
+
+def inverted_min_max(values, low, high):
+    """
+    Scale values to 0-100, with `low` scoring 100 and `high` scoring 0.
+
+    Values outside [low, high] are clipped and missing values stay NaN.
+    """
+    span = high - low
+    if not span > 0:
+        return np.where(np.isnan(values), np.nan, 100.0)
+    return (1 - (np.clip(values, low, high) - low) / span) * 100
+
+
+def robust_scores(values):
+    """Inverted min-max between the robust percentiles of the values."""
+    if np.isnan(values).all():
+        return values
+    low, high = np.nanpercentile(values, ROBUST_PERCENTILES)
+    return inverted_min_max(values, low, high)
+
+
+def max_ratio_scores(counts, denominators):
+    """The original score: the count as a share of the highest count."""
+    return (1 - counts / counts.max()) * 100
+
+
+def robust_min_max_scores(counts, denominators):
+    """Counts scaled between their 5th and 95th percentiles."""
+    return robust_scores(counts)
+
+
+def percentile_rank_scores(counts, denominators):
+    """Share of the other ZIP codes with more inspections."""
+    if len(counts) < 2:
+        return np.full(len(counts), 100.0)
+    sorted_counts = np.sort(counts)
+    more = len(counts) - np.searchsorted(sorted_counts, counts, side="right")
+    return more / (len(counts) - 1) * 100
+
+
+def density_scores(counts, denominators):
+    """Inspections per square mile, robustly scaled."""
+    return robust_scores(counts / denominators["area_sq_mi"])
+
+
+def per_lot_scores(counts, denominators):
+    """Inspections per tax lot, robustly scaled."""
+    return robust_scores(counts / denominators["lot_count"])
+
+
+# Scoring formulas by name: (label, description, denominator column it needs,
+# function). Each function maps an array of per-ZIP counts, and the aligned
+# denominators, to scores in a single vectorized pass
+FORMULAS = {
+    "max_ratio": (
+        "Share of the highest count",
+        "wellness_score = (1 - (inspection_count / max_inspection_count)) * 100",
+        None,
+        max_ratio_scores,
+    ),
+    "robust_min_max": (
+        "Robust min-max",
+        "wellness_score = (1 - (clip(inspection_count, p5, p95) - p5) / (p95 - p5)) * 100",
+        None,
+        robust_min_max_scores,
+    ),
+    "percentile_rank": (
+        "Percentile rank",
+        "wellness_score = share of the other ZIP codes with more inspections * 100",
+        None,
+        percentile_rank_scores,
+    ),
+    "density": (
+        "Inspections per square mile",
+        "density = inspection_count / area_sq_mi, scored with robust min-max",
+        "area_sq_mi",
+        density_scores,
+    ),
+    "per_lot": (
+        "Inspections per lot",
+        "rate = inspection_count / lot_count, scored with robust min-max",
+        "lot_count",
+        per_lot_scores,
+    ),
+}
+
+
+def available_formulas(denominators=None):
+    """Names of the formulas whose denominators are available."""
+    columns = [] if denominators is None else denominators.columns
+    return [
+        name
+        for name, (_, _, needs, _) in FORMULAS.items()
+        if needs is None or needs in columns
+    ]
+
+
+def score_counts(zipcode_counts, formula=DEFAULT_FORMULA, denominators=None):
+    """
+    Score a `zipcode_counts` frame with one of the `FORMULAS`.
+
+    Returns a float array aligned with the frame. Density-aware formulas need
+    the `denominators` frame from `build_denominators`; ZIP codes it doesn't
+    cover, or covers with a zero denominator, get a NaN score.
+    """
+    if formula not in FORMULAS:
+        raise ValueError(
+            f"Unknown scoring formula '{formula}'; choose from {sorted(FORMULAS)}"
+        )
+    needs, function = FORMULAS[formula][2:]
+    counts = zipcode_counts["inspection_count"].to_numpy(dtype=float)
+
+    aligned = None
+    if needs is not None:
+        if denominators is None or needs not in denominators.columns:
+            raise ValueError(f"The '{formula}' formula needs the '{needs}' column")
+        aligned = {
+            needs: denominators[needs]
+            .reindex(zipcode_counts["zipcode"])
+            .where(lambda values: values > 0)
+            .to_numpy(dtype=float)
+        }
+    return function(counts, aligned)
+
+
+def build_denominators(zipcodes_path=ZIPCODES_PATH, centroids_path=CENTROIDS_PATH):
+    """
+    Compute each ZIP code's land area and, with a centroid table, lot count.
+
+    The area comes from the boundary file's `Shape_Area` when it has one and
+    from the projected polygons otherwise. Lots are counted by placing the
+    centroids in the ZIP polygons. ZIP codes split over several polygons are
+    summed. Returns a frame indexed by ZIP code.
+    """
+    schema = resolve_zip_schema(zipcodes_path)
+    if schema is None:
+        raise ValueError(f"Couldn't identify the ZIP code field of '{zipcodes_path}'.")
+    has_shape_area = "Shape_Area" in schema["dtypes"]
+    boundaries = read_zip_boundaries(
+        zipcodes_path, schema, columns=["Shape_Area"] if has_shape_area else []
+    )
+    boundaries = boundaries.to_crs("EPSG:4326")
+
+    if has_shape_area:
+        area = boundaries["Shape_Area"].astype(float)
+    else:
+        area = boundaries.geometry.to_crs(AREA_CRS).area
+    denominators = pd.DataFrame(
+        {
+            "zipcode": format_zipcodes(parse_zipcodes(boundaries[schema["zip_field"]])),
+            "area_sq_mi": area.to_numpy() / SQUARE_FEET_PER_SQUARE_MILE,
+        }
+    )
+
+    if centroids_path and os.path.exists(centroids_path):
+        centroids = load_centroids(centroids_path)
+        index = PolygonIndex(boundaries.geometry.values)
+        denominators["lot_count"] = index.count(
+            centroids["longitude"].to_numpy(), centroids["latitude"].to_numpy()
+        )
+
+    return denominators.dropna(subset=["zipcode"]).groupby("zipcode").sum()
+
+
+def write_denominators(denominators, path=DENOMINATORS_PATH):
+    """Write the per-ZIP denominators."""
+    denominators.to_parquet(path)
+
+
+def load_denominators(path=DENOMINATORS_PATH):
+    """Load the denominators written by `write_denominators`, or None."""
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the per-ZIP denominators and compare scoring formulas."
+    )
+    parser.add_argument(
+        "--scores",
+        default="data/wellness_scores.parquet",
+        help="Wellness scores Parquet written by data_cleaning.py",
+    )
+    parser.add_argument(
+        "--zipcodes", default=ZIPCODES_PATH, help="ZIP code boundary GeoJSON"
+    )
+    parser.add_argument(
+        "--centroids",
+        default=CENTROIDS_PATH,
+        help="BBL to lat/lon centroid CSV, for the per-lot formula",
+    )
+    parser.add_argument(
+        "--output", default=DENOMINATORS_PATH, help="Per-ZIP denominators Parquet"
+    )
+    args = parser.parse_args()
+
+    print(f"Computing ZIP code areas and lot counts from '{args.zipcodes}'...")
+    denominators = build_denominators(args.zipcodes, args.centroids)
+    write_denominators(denominators, args.output)
+    print(f"Saved the denominators of {len(denominators)} ZIP codes to '{args.output}'")
+
+    if os.path.exists(args.scores):
+        zipcode_counts = pd.read_parquet(args.scores)
+        print("\nScores under each available formula:")
+        for formula in available_formulas(denominators):
+            scores = pd.Series(score_counts(zipcode_counts, formula, denominators))
+            print(f"\n{FORMULAS[formula][0]} ({formula}):")
+            print(scores.describe())
+
+
+if __name__ == "__main__":
+    main()
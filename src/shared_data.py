@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from geo_integration import (
+    GEOJSON_OUTPUT_PATH,
+    GEOPARQUET_OUTPUT_PATH,
+    WELLNESS_CSV_PATH,
+    WELLNESS_PARQUET_PATH,
+)
+
+# Read-only copies of the dashboard's data as uncompressed Arrow IPC files.
+# They are memory-mapped rather than read, so every dashboard process on a
+# host shares the same page-cache pages instead of holding its own copy
+SHARED_DIR = "data/shared"
+SCORES_ARTIFACT = os.path.join(SHARED_DIR, "wellness_scores.arrow")
+GEO_ARTIFACT = os.path.join(SHARED_DIR, "nyc_wellness_scores.arrow")
+
+# Files each artifact is published from; an artifact older than any of them
+# is stale and the dashboard reads the files directly instead
+SCORES_SOURCES = [WELLNESS_PARQUET_PATH, WELLNESS_CSV_PATH]
+GEO_SOURCES = [GEOPARQUET_OUTPUT_PATH, GEOJSON_OUTPUT_PATH]
+
+# Schema metadata of geometry artifacts, whose geometries are stored as WKB
+GEOMETRY_KEY = b"geometry_column"
+CRS_KEY = b"crs"
+
+# Strings map to Arrow-backed pandas strings, so they aren't copied into
+# Python objects either
+STRING_TYPES = {
+    pa.string(): pd.StringDtype("pyarrow"),
+    pa.large_string(): pd.StringDtype("pyarrow"),
+}
+
+
+def frame_to_table(df):
+    """
+    Convert a DataFrame or GeoDataFrame to an Arrow table for sharing.
+
+    Numeric columns keep NaN as a value rather than turning it into a null,
+    so they can later be viewed as NumPy arrays without a copy. Geometries
+    are stored as WKB, with the CRS in the schema metadata.
+    """
+    geometry_name = getattr(df, "_geometry_column_name", None)
+    columns = {}
+    for name in df.columns:
+        if name == geometry_name:
+            import shapely
+
+            columns[name] = pa.array(
+                shapely.to_wkb(np.asarray(df[name].values)), type=pa.binary()
+            )
+        elif df[name].dtype.kind in "biuf":
+            columns[name] = pa.array(df[name].to_numpy(), from_pandas=False)
+        else:
+            columns[name] = pa.array(df[name], from_pandas=True)
+    table = pa.table(columns)
+
+    if geometry_name is None:
+        return table
+    crs = df.crs.to_json() if df.crs is not None else ""
+    return table.replace_schema_metadata(
+        {GEOMETRY_KEY: geometry_name.encode(), CRS_KEY: crs.encode()}
+    )
+
+
+def publish_artifact(df, path):
+    """
+    Write a frame as a shared Arrow IPC artifact and return its size.
+
+    The file is written next to the artifact and moved into place, so
+    processes that have the previous version mapped keep reading it intact
+    until they remap.
+    """
+    table = frame_to_table(df)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with pa.OSFile(path + ".tmp", "wb") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(path + ".tmp", path)
+    return os.path.getsize(path)
+
+
+def map_table(path):
+    """Memory-map an artifact as an Arrow table without reading it."""
+    return ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def map_frame(path):
+    """
+    Memory-map an artifact as a DataFrame, or a GeoDataFrame for geometries.
+
+    Numeric columns without nulls are read-only NumPy views of the mapped
+    file and string columns are Arrow-backed, so the frame's data lives in
+    the page cache, shared by every process that maps it. Geometries can't
+    be shared; they are parsed from WKB by each process.
+    """
+    table = map_table(path)
+    columns = table.column_names
+    metadata = table.schema.metadata or {}
+    geometry_name = metadata.get(GEOMETRY_KEY, b"").decode()
+    if geometry_name:
+        geometries = table.column(geometry_name)
+        table = table.drop_columns([geometry_name])
+
+    df = table.to_pandas(types_mapper=STRING_TYPES.get, split_blocks=True)
+    if not geometry_name:
+        return df
+
+    import geopandas as gpd
+    import shapely
+
+    # The geometry goes back in its place without selecting columns, which
+    # would copy the mapped ones
+    crs = metadata.get(CRS_KEY, b"").decode()
+    df.insert(
+        columns.index(geometry_name),
+        geometry_name,
+        gpd.GeoSeries(
+            shapely.from_wkb(geometries.to_numpy(zero_copy_only=False)),
+            crs=json.loads(crs) if crs else None,
+        ),
+    )
+    return gpd.GeoDataFrame(df, geometry=geometry_name, copy=False)
+
+
+def artifact_is_current(path, sources):
+    """Whether an artifact exists and is at least as new as its source files."""
+    if not os.path.exists(path):
+        return False
+    mtimes = [os.path.getmtime(source) for source in sources if os.path.exists(source)]
+    return all(os.path.getmtime(path) >= mtime for mtime in mtimes)
+
+
+def artifacts_are_current():
+    """Whether every artifact whose source files exist is up to date."""
+    return all(
+        artifact_is_current(path, sources)
+        for path, sources in [
+            (SCORES_ARTIFACT, SCORES_SOURCES),
+            (GEO_ARTIFACT, GEO_SOURCES),
+        ]
+        if any(os.path.exists(source) for source in sources)
+    )
+
+
+def publish_artifacts(wellness_df=None, geo_df=None):
+    """
+    Publish the scores and merged geometries as shared artifacts.
+
+    Frames already in memory can be passed in; otherwise they are read from
+    the pipeline outputs. Sources that don't exist are skipped. Returns the
+    paths written.
+    """
+    published = []
+    if wellness_df is None:
+        if os.path.exists(WELLNESS_PARQUET_PATH):
+            wellness_df = pd.read_parquet(WELLNESS_PARQUET_PATH)
+        elif os.path.exists(WELLNESS_CSV_PATH):
+            wellness_df = pd.read_csv(WELLNESS_CSV_PATH, dtype={"zipcode": str})
+    if wellness_df is not None:
+        publish_artifact(wellness_df, SCORES_ARTIFACT)
+        published.append(SCORES_ARTIFACT)
+
+    if geo_df is None:
+        if os.path.exists(GEOPARQUET_OUTPUT_PATH):
+            import geopandas as gpd
+
+            geo_df = gpd.read_parquet(GEOPARQUET_OUTPUT_PATH)
+        elif os.path.exists(GEOJSON_OUTPUT_PATH):
+            from geojson_io import read_geojson
+
+            geo_df = read_geojson(GEOJSON_OUTPUT_PATH)
+    if geo_df is not None:
+        publish_artifact(geo_df, GEO_ARTIFACT)
+        published.append(GEO_ARTIFACT)
+    return published
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Publish the dashboard data as shared memory-mapped artifacts."
+    )
+    parser.parse_args()
+
+    print("Publishing the shared dashboard data...")
+    for path in publish_artifacts():
+        print(f"Saved {os.path.getsize(path) / 1024:.0f} KB to '{path}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import geopandas as gpd
+import numpy as np
+import topojson as tp
+import json
+import os
+
+from geojson_io import read_geojson
+from zip_schema import cached_zipcode_field
+
+GEOPARQUET_INPUT_PATH = "data/geo/nyc_wellness_scores.parquet"
+GEOJSON_INPUT_PATH = "data/geo/nyc_wellness_scores.geojson"
+OUTPUT_DIR = "data/geo/simplified"
+LEVELS_MANIFEST = "levels.json"
+
+# Name of the TopoJSON object holding the ZIP polygons
+TOPOJSON_OBJECT = "zipcodes"
+
+# Map zoom levels to precompute, with the quantization grid used for each.
+# Grid cells stay well under a screen pixel (5e3 is ~10 m across NYC).
+ZOOM_LEVELS = {10: 5e3, 12: 2e4, 14: 1e5}
+
+# Simplify shared arcs to one screen pixel at each zoom level
+NYC_LATITUDE = 40.7128
+METERS_PER_DEGREE = 111_320
+TOLERANCE_PIXELS = 1
+
+# Short property names keep the per-feature payload small; the manifest maps
+# them back so the dashboard tooltip can label them
+ZIPCODE_FIELDS = ["postalcode", "zipcode", "zip", "postal_code", "zip_code"]
+PROPERTY_NAMES = {
+    "key": "zip",
+    "wellness_score": "score",
+    "inspection_count": "count",
+}
+
+
+def meters_per_pixel(zoom, latitude=NYC_LATITUDE):
+    """Ground resolution of a Web Mercator map tile pixel at the given zoom."""
+    return 156543.03392 * np.cos(np.radians(latitude)) / 2**zoom
+
+
+def slim_properties(geo_df, key_field=None, key_name=PROPERTY_NAMES["key"]):
+    """Keep only the key and score columns, rounded to what the tooltip shows."""
+    # Without a recorded ZIP field, pick the first matching column like the
+    # dashboard does
+    if key_field is None:
+        key_field = next(col for col in geo_df.columns if col.lower() in ZIPCODE_FIELDS)
+    # Missing scores become JSON nulls rather than NaN, which isn't valid JSON
+    scores = geo_df["wellness_score"].round(2)
+    counts = geo_df["inspection_count"].astype("Int64")
+    slim = gpd.GeoDataFrame(
+        {
+            key_name: geo_df[key_field].astype(str),
+            PROPERTY_NAMES["wellness_score"]: scores.astype(object).where(
+                scores.notna(), None
+            ),
+            PROPERTY_NAMES["inspection_count"]: counts.astype(object).where(
+                counts.notna(), None
+            ),
+        },
+        geometry=geo_df.geometry,
+        crs=geo_df.crs,
+    )
+    return slim
+
+
+def build_simplified_levels(
+    geo_df=None,
+    key_field=None,
+    key_name=PROPERTY_NAMES["key"],
+    label="ZIP Code",
+    object_name=TOPOJSON_OBJECT,
+    zoom_levels=ZOOM_LEVELS,
+    output_dir=OUTPUT_DIR,
+):
+    """
+    Precompute simplified, quantized TopoJSON copies of scored geometries.
+
+    TopoJSON stores every shared border once as an arc, so simplifying the
+    arcs keeps neighbouring polygons gap-free, and quantized, delta-encoded
+    coordinates keep the payload small. Writes one file per zoom level plus a
+    manifest the dashboard uses to serve the smallest file that fits the zoom.
+
+    By default the merged ZIP code geometries are used; other resolutions
+    pass their own `geo_df` with the `key_field` that identifies a polygon.
+    """
+    source_bytes = None
+    if geo_df is None:
+        print("Loading merged geospatial data...")
+        if os.path.exists(GEOPARQUET_INPUT_PATH):
+            geo_df = gpd.read_parquet(GEOPARQUET_INPUT_PATH)
+            source_path = GEOPARQUET_INPUT_PATH
+        else:
+            geo_df = read_geojson(GEOJSON_INPUT_PATH)
+            source_path = GEOJSON_INPUT_PATH
+        print(f"Loaded {len(geo_df)} ZIP code boundaries from '{source_path}'.")
+        key_field = key_field or cached_zipcode_field(source_path)
+        if os.path.exists(GEOJSON_INPUT_PATH):
+            source_bytes = os.path.getsize(GEOJSON_INPUT_PATH)
+
+    geo_df = slim_properties(geo_df.to_crs("EPSG:4326"), key_field, key_name)
+
+    os.makedirs(output_dir, exist_ok=True)
+    levels = []
+    for zoom, quantization in sorted(zoom_levels.items()):
+        tolerance = TOLERANCE_PIXELS * meters_per_pixel(zoom) / METERS_PER_DEGREE
+        print(f"\nSimplifying for zoom {zoom} (tolerance {tolerance:.6f} deg)...")
+
+        topology = tp.Topology(
+            geo_df,
+            object_name=object_name,
+            prequantize=True,
+            toposimplify=tolerance,
+            topoquantize=quantization,
+        )
+
+        # Feature ids and bounding boxes aren't used by the map
+        topo_dict = topology.to_dict()
+        topo_dict.pop("bbox", None)
+        for geometry in topo_dict["objects"][object_name]["geometries"]:
+            geometry.pop("id", None)
+
+        file_name = f"nyc_wellness_scores_z{zoom}.topojson"
+        path = os.path.join(output_dir, file_name)
+        with open(path, "w") as f:
+            json.dump(topo_dict, f, separators=(",", ":"))
+
+        size = os.path.getsize(path)
+        if source_bytes:
+            print(
+                f"Saved {size / 1024:.0f} KB ({source_bytes / size:.1f}x smaller "
+                f"than the merged GeoJSON) to '{path}'"
+            )
+        else:
+            print(f"Saved {size / 1024:.0f} KB to '{path}'")
+        levels.append({"zoom": zoom, "file": file_name, "bytes": size})
+
+    manifest_path = os.path.join(output_dir, LEVELS_MANIFEST)
+    with open(manifest_path, "w") as f:
+        json.dump(
+            {
+                "label": label,
+                "object": object_name,
+                "properties": {**PROPERTY_NAMES, "key": key_name},
+                "levels": levels,
+            },
+            f,
+            indent=2,
+        )
+    print(f"\nSaved level manifest to '{manifest_path}'")
+
+    return levels
+
+
+if __name__ == "__main__":
+    build_simplified_levels()
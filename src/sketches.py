@@ -0,0 +1,157 @@
+import numpy as np
+
+# Scores are percentages, so a sketch counts them in fixed bins over this
+# range. Quantiles are then within half a bin of the exact value, and two
+# sketches merge exactly by adding their bins, whatever rows they came from.
+SCORE_RANGE = (0.0, 100.0)
+SKETCH_BINS = 10_000
+
+
+class ScoreSketch:
+    """
+    Mergeable summary of a set of scores: fixed-width bin counts plus moments.
+
+    The count, sum, sum of squares, minimum and maximum are exact, so the
+    mean, standard deviation and extremes are too; quantiles and histograms
+    come from the bins, 0.01 points wide. Sketches of disjoint sets of rows,
+    such as ZIP codes, boroughs or partitions of a large input, add up to
+    the sketch of their union, so statistics over any subset come from
+    merging sketches instead of rescanning the rows. Missing values are
+    skipped.
+    """
+
+    def __init__(self):
+        self.bins = np.zeros(SKETCH_BINS, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+
+    @classmethod
+    def from_values(cls, values):
+        """A sketch of an array of scores."""
+        sketch = cls()
+        sketch.add(values)
+        return sketch
+
+    @classmethod
+    def merge_all(cls, sketches):
+        """The sketch of the union of the rows behind several sketches."""
+        merged = cls()
+        for sketch in sketches:
+            merged.merge(sketch)
+        return merged
+
+    def add(self, values):
+        """Add an array of scores to the sketch."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        low, high = SCORE_RANGE
+        # Values on or past the top edge go in the last bin, as in np.histogram
+        positions = np.floor((values - low) * (SKETCH_BINS / (high - low)))
+        positions = np.clip(positions, 0, SKETCH_BINS - 1).astype(np.int64)
+        self.bins += np.bincount(positions, minlength=SKETCH_BINS)
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.total_sq += float(np.square(values).sum())
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+        return self
+
+    def merge(self, other):
+        """Fold another sketch into this one."""
+        self.bins += other.bins
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    def __add__(self, other):
+        return ScoreSketch().merge(self).merge(other)
+
+    def mean(self):
+        return self.total / self.count if self.count else np.nan
+
+    def std(self):
+        """Sample standard deviation, as pandas computes it."""
+        if self.count < 2:
+            return np.nan
+        variance = (self.total_sq - self.total**2 / self.count) / (self.count - 1)
+        return float(np.sqrt(max(variance, 0.0)))
+
+    def _value_at(self, rank, cumulative):
+        # Rows within a bin are taken to sit at its midpoint, which can't be
+        # past the known extremes
+        low, high = SCORE_RANGE
+        position = np.searchsorted(cumulative, rank, side="right")
+        value = low + (position + 0.5) * (high - low) / SKETCH_BINS
+        return float(np.clip(value, self.minimum, self.maximum))
+
+    def quantile(self, q):
+        """
+        The `q` quantile, within half a bin of the exact one.
+
+        Interpolates linearly between the neighbouring rows, as pandas does
+        by default, and is exact at 0 and 1.
+        """
+        if not self.count:
+            return np.nan
+        if q <= 0:
+            return self.minimum
+        if q >= 1:
+            return self.maximum
+        cumulative = np.cumsum(self.bins)
+        rank = q * (self.count - 1)
+        below, above = np.floor(rank), np.ceil(rank)
+        low_value = self._value_at(below, cumulative)
+        high_value = self._value_at(above, cumulative)
+        return low_value + (rank - below) * (high_value - low_value)
+
+    def histogram(self, bins):
+        """
+        Counts and edges of `bins` equal-width bins over the score range.
+
+        `bins` has to divide the sketch's bin count, so each histogram bin
+        is the exact sum of sketch bins.
+        """
+        if SKETCH_BINS % bins:
+            raise ValueError(f"{bins} bins don't divide the {SKETCH_BINS} sketch bins")
+        counts = self.bins.reshape(bins, -1).sum(axis=1)
+        edges = np.linspace(*SCORE_RANGE, bins + 1)
+        return counts, edges
+
+    def to_dict(self):
+        """
+        The sketch as plain JSON-serializable values.
+
+        Only the non-empty bins are listed, so the sketch of a single ZIP
+        code takes a few numbers.
+        """
+        present = np.flatnonzero(self.bins)
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "sum_sq": self.total_sq,
+            "min": self.minimum if self.count else None,
+            "max": self.maximum if self.count else None,
+            "bins": [present.tolist(), self.bins[present].tolist()],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a sketch from `to_dict`."""
+        sketch = cls()
+        positions, counts = data["bins"]
+        sketch.bins[np.asarray(positions, dtype=np.int64)] = counts
+        sketch.count = data["count"]
+        sketch.total = data["sum"]
+        sketch.total_sq = data["sum_sq"]
+        if sketch.count:
+            sketch.minimum = data["min"]
+            sketch.maximum = data["max"]
+        return sketch
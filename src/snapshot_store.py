@@ -0,0 +1,214 @@
+import argparse
+import os
+import re
+import shutil
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+STORE_DIR = "data/snapshots"
+ZIP_INDEX_FILE = "by_zip.parquet"
+PARTITION_PREFIX = "snapshot_date="
+SNAPSHOT_COLUMNS = ["zipcode", "inspection_count", "wellness_score"]
+
+# Small row groups let a per-ZIP query skip everything but a few groups,
+# using the zipcode min/max statistics Parquet keeps for each group
+INDEX_ROW_GROUP_SIZE = 4096
+
+# Dated exports look like ..._Lot_Info_20250408.csv
+SNAPSHOT_DATE_PATTERN = re.compile(r"_(\d{8})\.csv$")
+
+INDEX_SCHEMA = pa.schema(
+    [
+        ("zipcode", pa.string()),
+        ("snapshot_date", pa.string()),
+        ("inspection_count", pa.int64()),
+        ("wellness_score", pa.float64()),
+    ]
+)
+
+
+def snapshot_date_from_path(path):
+    """The ISO snapshot date in a dated export's file name, or None."""
+    match = SNAPSHOT_DATE_PATTERN.search(os.path.basename(path))
+    if not match:
+        return None
+    return datetime.strptime(match.group(1), "%Y%m%d").date().isoformat()
+
+
+def parse_snapshot_date(value):
+    """The ISO date of a YYYY-MM-DD snapshot date given on the command line."""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"invalid snapshot date '{value}' (expected YYYY-MM-DD)"
+        )
+
+
+def partition_path(date, store_dir=STORE_DIR):
+    """Directory of one snapshot's partition."""
+    return os.path.join(store_dir, f"{PARTITION_PREFIX}{date}")
+
+
+def list_snapshots(store_dir=STORE_DIR):
+    """
+    Sorted ISO dates of the stored snapshots.
+
+    Partitions still being written, or left over by an interrupted write,
+    carry a `.tmp` suffix and aren't listed.
+    """
+    if not os.path.isdir(store_dir):
+        return []
+    return sorted(
+        name[len(PARTITION_PREFIX) :]
+        for name in os.listdir(store_dir)
+        if name.startswith(PARTITION_PREFIX) and not name.endswith(".tmp")
+    )
+
+
+def read_snapshot(date, store_dir=STORE_DIR):
+    """Per-ZIP counts and scores of one snapshot."""
+    return pd.read_parquet(
+        os.path.join(partition_path(date, store_dir), "part.parquet")
+    )
+
+
+def write_zip_index(history, store_dir=STORE_DIR):
+    """Write the per-ZIP index, sorted so each ZIP's rows are contiguous."""
+    history = history.sort_values(["zipcode", "snapshot_date"], kind="stable")
+    table = pa.Table.from_pandas(
+        history[INDEX_SCHEMA.names], schema=INDEX_SCHEMA, preserve_index=False
+    )
+    index_path = os.path.join(store_dir, ZIP_INDEX_FILE)
+    pq.write_table(table, index_path + ".tmp", row_group_size=INDEX_ROW_GROUP_SIZE)
+    os.replace(index_path + ".tmp", index_path)
+
+
+def read_zip_index(store_dir=STORE_DIR):
+    """The full per-ZIP index, or an empty frame if there is none yet."""
+    index_path = os.path.join(store_dir, ZIP_INDEX_FILE)
+    if not os.path.exists(index_path):
+        return INDEX_SCHEMA.empty_table().to_pandas()
+    return pd.read_parquet(index_path)
+
+
+def add_snapshot(wellness_df, date, store_dir=STORE_DIR, replace=False):
+    """
+    Append one snapshot of per-ZIP counts and scores to the store.
+
+    Snapshots are append-only: a date that is already stored is left as is
+    unless `replace` is set. The new rows are also merged into the per-ZIP
+    index. Returns whether the snapshot was written.
+    """
+    target = partition_path(date, store_dir)
+    if os.path.exists(target) and not replace:
+        return False
+
+    # Write the partition next to its final place and move it in one step,
+    # so readers never see a half-written snapshot
+    tmp = target + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    snapshot = wellness_df[SNAPSHOT_COLUMNS].reset_index(drop=True)
+    snapshot.to_parquet(os.path.join(tmp, "part.parquet"), index=False)
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+
+    history = read_zip_index(store_dir)
+    history = history[history["snapshot_date"] != date]
+    write_zip_index(
+        pd.concat([history, snapshot.assign(snapshot_date=date)], ignore_index=True),
+        store_dir,
+    )
+    return True
+
+
+def rebuild_zip_index(store_dir=STORE_DIR):
+    """Rebuild the per-ZIP index from every stored partition."""
+    snapshots = [
+        read_snapshot(date, store_dir).assign(snapshot_date=date)
+        for date in list_snapshots(store_dir)
+    ]
+    if snapshots:
+        write_zip_index(pd.concat(snapshots, ignore_index=True), store_dir)
+    return len(snapshots)
+
+
+def zip_history(zipcode, start=None, end=None, store_dir=STORE_DIR):
+    """
+    Counts and scores of one ZIP code across snapshots, oldest first.
+
+    Reads only the index row groups whose ZIP code range covers `zipcode`,
+    optionally limited to snapshots between the ISO dates `start` and `end`.
+    """
+    index_path = os.path.join(store_dir, ZIP_INDEX_FILE)
+    if not os.path.exists(index_path):
+        return INDEX_SCHEMA.empty_table().to_pandas()
+
+    filters = [("zipcode", "=", zipcode)]
+    if start:
+        filters.append(("snapshot_date", ">=", start))
+    if end:
+        filters.append(("snapshot_date", "<=", end))
+    return pq.read_table(index_path, filters=filters).to_pandas()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Manage the dated snapshots of per-ZIP wellness scores."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add = subparsers.add_parser("add", help="Store the current scores as a snapshot")
+    add.add_argument(
+        "--scores",
+        default="data/wellness_scores.parquet",
+        help="Wellness scores Parquet written by data_cleaning.py",
+    )
+    add.add_argument(
+        "--date",
+        type=parse_snapshot_date,
+        required=True,
+        help="Snapshot date (YYYY-MM-DD)",
+    )
+    add.add_argument(
+        "--replace", action="store_true", help="Overwrite an existing snapshot"
+    )
+
+    subparsers.add_parser("list", help="List the stored snapshots")
+    subparsers.add_parser("rebuild-index", help="Rebuild the per-ZIP index")
+
+    history = subparsers.add_parser("history", help="Show one ZIP code's history")
+    history.add_argument("zipcode")
+    history.add_argument(
+        "--start", type=parse_snapshot_date, help="First snapshot date (YYYY-MM-DD)"
+    )
+    history.add_argument(
+        "--end", type=parse_snapshot_date, help="Last snapshot date (YYYY-MM-DD)"
+    )
+
+    parser.add_argument("--store", default=STORE_DIR, help="Snapshot store directory")
+    args = parser.parse_args()
+
+    if args.command == "add":
+        date = args.date
+        wellness_df = pd.read_parquet(args.scores)
+        if add_snapshot(wellness_df, date, args.store, args.replace):
+            print(f"Stored {len(wellness_df)} ZIP codes as snapshot {date}.")
+        else:
+            print(f"Snapshot {date} already exists; use --replace to overwrite it.")
+    elif args.command == "list":
+        for date in list_snapshots(args.store):
+            print(date)
+    elif args.command == "rebuild-index":
+        count = rebuild_zip_index(args.store)
+        print(f"Rebuilt the per-ZIP index from {count} snapshots.")
+    else:
+        print(zip_history(args.zipcode, args.start, args.end, args.store))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import shapely
+
+# BBL-to-centroid table, e.g. an extract of MapPLUTO's BBL, latitude, longitude
+CENTROIDS_PATH = "data/bbl_centroids.csv"
+CENTROID_COLUMNS = {"bbl": "bbl", "latitude": "latitude", "longitude": "longitude"}
+
+
+class PolygonIndex:
+    """
+    STRtree over a set of polygons for bulk point-in-polygon assignment.
+
+    Build it once per polygon set and reuse it for every batch of points; a
+    batch is assigned with a single vectorized tree query instead of a
+    row-by-row join.
+    """
+
+    def __init__(self, geometries):
+        self.geometries = np.asarray(geometries)
+        self.tree = shapely.STRtree(self.geometries)
+
+    def __len__(self):
+        return len(self.geometries)
+
+    def assign(self, lons, lats):
+        """
+        Return the index of the polygon containing each point, or -1.
+
+        Points on a border shared by two polygons go to the lower index, so
+        the assignment is deterministic.
+        """
+        lons = np.asarray(lons, dtype=float)
+        lats = np.asarray(lats, dtype=float)
+        result = np.full(len(lons), -1, dtype=np.int64)
+
+        valid = ~(np.isnan(lons) | np.isnan(lats))
+        points = shapely.points(lons[valid], lats[valid])
+        point_idx, polygon_idx = self.tree.query(points, predicate="intersects")
+
+        # Keep the lowest polygon index for each point
+        order = np.lexsort((polygon_idx, point_idx))
+        point_idx, polygon_idx = point_idx[order], polygon_idx[order]
+        first = np.unique(point_idx, return_index=True)[1]
+
+        assigned = np.full(len(points), -1, dtype=np.int64)
+        assigned[point_idx[first]] = polygon_idx[first]
+        result[valid] = assigned
+        return result
+
+    def count(self, lons, lats):
+        """Count the points falling in each polygon."""
+        assigned = self.assign(lons, lats)
+        return np.bincount(assigned[assigned >= 0], minlength=len(self))
+
+
+def load_centroids(path=CENTROIDS_PATH):
+    """Load lot centroids indexed by BBL, with compact float32 coordinates."""
+    centroids = pd.read_csv(
+        path,
+        usecols=list(CENTROID_COLUMNS.values()),
+        dtype={
+            CENTROID_COLUMNS["bbl"]: "int64",
+            CENTROID_COLUMNS["latitude"]: "float32",
+            CENTROID_COLUMNS["longitude"]: "float32",
+        },
+    )
+    centroids = centroids.drop_duplicates(subset=CENTROID_COLUMNS["bbl"])
+    return centroids.set_index(CENTROID_COLUMNS["bbl"])
+
+
+def locate_lots(bbls, centroids):
+    """
+    Look up (longitude, latitude) arrays for an array of BBLs.
+
+    BBLs that are missing or not in the centroid table come back as NaN,
+    which `PolygonIndex.assign` leaves unassigned.
+    """
+    bbls = pd.Series(bbls, dtype="float64")
+    positions = np.full(len(bbls), -1, dtype=np.int64)
+    known = bbls.notna().to_numpy()
+    positions[known] = centroids.index.get_indexer(bbls[known].astype("int64"))
+
+    found = positions >= 0
+    lons = np.full(len(bbls), np.nan)
+    lats = np.full(len(bbls), np.nan)
+    lons[found] = centroids[CENTROID_COLUMNS["longitude"]].to_numpy()[positions[found]]
+    lats[found] = centroids[CENTROID_COLUMNS["latitude"]].to_numpy()[positions[found]]
+    return lons, lats
@@ -0,0 +1,198 @@
+import argparse
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from data_cleaning import (
+    BBL_COLUMN,
+    DEFAULT_CHUNKSIZE,
+    RAW_DATA_PATH,
+    compute_wellness_scores,
+)
+from geojson_io import NDJSON_EXTENSIONS, read_geojson, write_geojson
+from simplify_geometries import OUTPUT_DIR as SIMPLIFIED_DIR
+from simplify_geometries import build_simplified_levels
+from spatial_index import CENTROIDS_PATH, PolygonIndex, load_centroids, locate_lots
+
+# Polygon resolutions, each with a default boundary file and its key field
+RESOLUTIONS = {
+    "tract": {
+        "label": "Census Tract",
+        "boundaries": "data/geo/nyc_census_tracts.geojson",
+        "key_field": "GEOID",
+    },
+    "block": {
+        "label": "Census Block",
+        "boundaries": "data/geo/nyc_census_blocks.geojson",
+        "key_field": "GEOID",
+    },
+}
+H3_RESOLUTION = 9  # ~0.1 km^2 hexagons
+
+
+def iter_lot_coordinates(path, centroids, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Stream (longitude, latitude) arrays for the raw lot records in chunks.
+
+    Records are located through their BBL; lots missing from the centroid
+    table come back as NaN and are skipped by the spatial assignment.
+    """
+    reader = pd.read_csv(
+        path, usecols=[BBL_COLUMN], dtype={BBL_COLUMN: "float64"}, chunksize=chunksize
+    )
+    for chunk in reader:
+        yield locate_lots(chunk[BBL_COLUMN].dropna(), centroids)
+
+
+def aggregate_polygons(path, centroids, boundaries, key_field, chunksize):
+    """Count lot records per boundary polygon through an STRtree."""
+    print(f"Building spatial index over {len(boundaries)} polygons...")
+    index = PolygonIndex(boundaries.geometry.values)
+
+    counts = np.zeros(len(index), dtype=np.int64)
+    rows_read = 0
+    for lons, lats in iter_lot_coordinates(path, centroids, chunksize):
+        rows_read += len(lons)
+        counts += index.count(lons, lats)
+    print(f"Assigned {counts.sum()} of {rows_read} records to polygons.")
+
+    units = boundaries[[key_field, "geometry"]].copy()
+    units["inspection_count"] = counts
+    return units
+
+
+def aggregate_h3(path, centroids, h3_resolution, chunksize):
+    """
+    Count lot records per H3 hexagon and build the hexagon polygons.
+
+    Records are counted per lot centroid first, so each distinct location is
+    converted to its H3 cell once, however many records it has; h3 only
+    converts one point per call.
+    """
+    # h3 is only needed for this resolution
+    import h3
+
+    location_counts = []
+    rows_read = 0
+    for lons, lats in iter_lot_coordinates(path, centroids, chunksize):
+        rows_read += len(lons)
+        found = ~np.isnan(lons)
+        locations = pd.DataFrame({"lat": lats[found], "lon": lons[found]})
+        location_counts.append(locations.value_counts(sort=False))
+    locations = pd.concat(location_counts).groupby(level=["lat", "lon"]).sum()
+
+    cells = [
+        h3.latlng_to_cell(lat, lon, h3_resolution)
+        for lat, lon in zip(
+            locations.index.get_level_values("lat"),
+            locations.index.get_level_values("lon"),
+        )
+    ]
+    totals = locations.groupby(cells).sum()
+    print(f"Assigned {int(totals.sum())} of {rows_read} records to H3 cells.")
+
+    # All the hexagon rings are built in one call from their stacked
+    # vertices, flipped from h3's (lat, lon) to (lon, lat)
+    cells = totals.index.tolist()
+    boundaries = [h3.cell_to_boundary(cell) for cell in cells]
+    vertices = np.array([vertex for boundary in boundaries for vertex in boundary])
+    ring_ids = np.repeat(np.arange(len(cells)), [len(b) for b in boundaries])
+    polygons = shapely.polygons(
+        shapely.linearrings(vertices.reshape(-1, 2)[:, ::-1], indices=ring_ids)
+    )
+    return gpd.GeoDataFrame(
+        {"h3_cell": cells, "inspection_count": totals.astype("int64").values},
+        geometry=polygons,
+        crs="EPSG:4326",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Aggregate sidewalk inspections below ZIP code level."
+    )
+    parser.add_argument(
+        "--resolution", choices=list(RESOLUTIONS) + ["h3"], required=True
+    )
+    parser.add_argument(
+        "--input", default=RAW_DATA_PATH, help="Raw lot info CSV export"
+    )
+    parser.add_argument(
+        "--centroids", default=CENTROIDS_PATH, help="BBL to lat/lon centroid CSV"
+    )
+    parser.add_argument("--boundaries", help="Boundary file (defaults per resolution)")
+    parser.add_argument("--key-field", help="Polygon key field in the boundaries")
+    parser.add_argument("--h3-resolution", type=int, default=H3_RESOLUTION)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument(
+        "--geojson",
+        action="store_true",
+        help="Also write the scored geometries as GeoJSON",
+    )
+    parser.add_argument(
+        "--precision",
+        type=int,
+        help="Round GeoJSON coordinates to this many decimals (5 is about 1 m)",
+    )
+    args = parser.parse_args()
+
+    print(f"Loading lot centroids from '{args.centroids}'...")
+    centroids = load_centroids(args.centroids)
+    print(f"Loaded {len(centroids)} lot centroids.")
+
+    if args.resolution == "h3":
+        label = f"H3 Cell (res {args.h3_resolution})"
+        key_field = "h3_cell"
+        units = aggregate_h3(args.input, centroids, args.h3_resolution, args.chunksize)
+    else:
+        settings = RESOLUTIONS[args.resolution]
+        label = settings["label"]
+        key_field = args.key_field or settings["key_field"]
+        boundaries_path = args.boundaries or settings["boundaries"]
+        print(f"\nLoading {label.lower()} boundaries from '{boundaries_path}'...")
+        # GeoJSON is streamed without GDAL, which matters for block-level
+        # files; shapefiles and other formats still go through GDAL
+        if boundaries_path.lower().endswith((".geojson", ".json") + NDJSON_EXTENSIONS):
+            boundaries = read_geojson(boundaries_path)
+        else:
+            boundaries = gpd.read_file(boundaries_path)
+        boundaries = boundaries.to_crs("EPSG:4326")
+        boundaries[key_field] = boundaries[key_field].astype(str)
+        units = aggregate_polygons(
+            args.input, centroids, boundaries, key_field, args.chunksize
+        )
+
+    # Score only the units with records, as the ZIP code scores do
+    scores = compute_wellness_scores(
+        units.loc[units["inspection_count"] > 0, [key_field, "inspection_count"]].copy()
+    )
+    units = units[[key_field, "geometry"]].merge(scores, on=key_field, how="left")
+    print(f"\nScored {len(scores)} of {len(units)} {label.lower()} units.")
+
+    scores_path = f"data/wellness_scores_{args.resolution}.parquet"
+    scores.to_parquet(scores_path, index=False)
+    print(f"Saved scores to '{scores_path}'")
+    geo_path = f"data/geo/nyc_wellness_scores_{args.resolution}.parquet"
+    units.to_parquet(geo_path)
+    print(f"Saved geometries to '{geo_path}'")
+    if args.geojson:
+        geojson_path = f"data/geo/nyc_wellness_scores_{args.resolution}.geojson"
+        write_geojson(units, geojson_path, precision=args.precision)
+        print(f"Saved geometries to '{geojson_path}'")
+
+    # Precompute simplified map levels so the dashboard can switch resolution
+    build_simplified_levels(
+        geo_df=units,
+        key_field=key_field,
+        key_name="id",
+        label=label,
+        object_name=args.resolution,
+        output_dir=os.path.join(SIMPLIFIED_DIR, args.resolution),
+    )
+
+
+if __name__ == "__main__":
+    main()
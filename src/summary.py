@@ -0,0 +1,76 @@
+import json
+
+from sketches import ScoreSketch
+
+SUMMARY_PATH = "data/wellness_summary.json"
+
+# Rows shown in the dashboard's top and bottom rankings
+RANKING_SIZE = 10
+# Equal-width histogram bins over the 0-100% score range
+HISTOGRAM_BINS = 20
+
+
+def sketch_stats(sketch):
+    """
+    The statistical summary of a score sketch.
+
+    The mean, standard deviation and extremes are exact; the quartiles and
+    median are within 0.005 points.
+    """
+    return {
+        "mean": float(sketch.mean()),
+        "median": float(sketch.quantile(0.5)),
+        "std": float(sketch.std()),
+        "min": float(sketch.quantile(0)),
+        "q25": float(sketch.quantile(0.25)),
+        "q75": float(sketch.quantile(0.75)),
+        "max": float(sketch.quantile(1)),
+    }
+
+
+def sketch_histogram(sketch):
+    """The dashboard's score histogram, read off a score sketch."""
+    counts, edges = sketch.histogram(HISTOGRAM_BINS)
+    return {"edges": edges.tolist(), "counts": counts.tolist()}
+
+
+def build_summary(wellness_df, sketch=None):
+    """
+    Precompute everything the dashboard shows before any table is touched.
+
+    Covers the metrics row, the statistical summary, the top and bottom
+    rankings and the score histogram, as plain JSON-serializable values.
+    The distribution comes from a `ScoreSketch` of the scores, or from
+    `sketch` when the scores have already been sketched, for example by
+    merging the sketches of their parts; the sketch is kept in the summary
+    so it can be merged further.
+    """
+    if sketch is None:
+        sketch = ScoreSketch.from_values(wellness_df["wellness_score"])
+    ranked = wellness_df.sort_values("wellness_score", ascending=False, kind="stable")
+
+    def records(frame):
+        return json.loads(frame.to_json(orient="records"))
+
+    return {
+        "count": int(len(wellness_df)),
+        "stats": sketch_stats(sketch),
+        "top": records(ranked.head(RANKING_SIZE)),
+        "bottom": records(
+            wellness_df.sort_values("wellness_score", kind="stable").head(RANKING_SIZE)
+        ),
+        "histogram": sketch_histogram(sketch),
+        "sketch": sketch.to_dict(),
+    }
+
+
+def write_summary(wellness_df, path=SUMMARY_PATH):
+    """Write the dashboard summary of the wellness scores."""
+    with open(path, "w") as f:
+        json.dump(build_summary(wellness_df), f, indent=2)
+
+
+def load_summary(path=SUMMARY_PATH):
+    """Load the summary written by `write_summary`."""
+    with open(path, "r") as f:
+        return json.load(f)
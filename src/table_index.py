@@ -0,0 +1,65 @@
+import numpy as np
+
+from zip_codes import ZIP_CODE_COUNT, parse_zipcodes
+
+
+class TableIndex:
+    """
+    Sorted views of a score table for fast search, filtering and ordering.
+
+    Keys and values are sorted once when the index is built. A prefix search
+    or a value range is then two binary searches into the sorted arrays, and
+    each sort order is a precomputed permutation, so selecting rows never
+    scans strings or re-sorts the table. Keys are held as uint32 ZIP codes,
+    so a ZIP prefix is a numeric range.
+    """
+
+    def __init__(self, df, key="zipcode", value="wellness_score"):
+        keys = parse_zipcodes(df[key])
+        self.by_key = np.argsort(keys, kind="stable")
+        self.sorted_keys = keys[self.by_key]
+
+        values = df[value].to_numpy(dtype=float)
+        self.by_value = np.argsort(values, kind="stable")
+        self.sorted_values = values[self.by_value]
+
+    def __len__(self):
+        return len(self.by_key)
+
+    def prefix_rows(self, prefix):
+        """Row positions whose key starts with `prefix`."""
+        if not prefix:
+            return self.by_key
+        if not (prefix.isdigit() and len(prefix) <= 5):
+            return self.by_key[:0]
+        # The ZIP codes starting with "112" are the range [11200, 11300)
+        scale = ZIP_CODE_COUNT // 10 ** len(prefix)
+        low = np.searchsorted(self.sorted_keys, int(prefix) * scale, side="left")
+        high = np.searchsorted(self.sorted_keys, (int(prefix) + 1) * scale, side="left")
+        return self.by_key[low:high]
+
+    def value_rows(self, low, high):
+        """Row positions whose value lies in [low, high]."""
+        start = np.searchsorted(self.sorted_values, low, side="left")
+        end = np.searchsorted(self.sorted_values, high, side="right")
+        return self.by_value[start:end]
+
+    def select(
+        self, prefix="", low=-np.inf, high=np.inf, sort_by="key", descending=False
+    ):
+        """
+        Row positions matching a key prefix and value range, in sort order.
+
+        `sort_by` is "key" or "value"; ascending ties keep their row order.
+        """
+        keep = np.zeros(len(self), dtype=bool)
+        keep[self.value_rows(low, high)] = True
+        if prefix:
+            matches = np.zeros(len(self), dtype=bool)
+            matches[self.prefix_rows(prefix)] = True
+            keep &= matches
+
+        order = self.by_key if sort_by == "key" else self.by_value
+        if descending:
+            order = order[::-1]
+        return order[keep[order]]
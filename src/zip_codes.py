@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+# ZIP codes are handled as their integer value in a uint32 array, so joins
+# are integer comparisons and per-ZIP tables are indexed directly by the
+# code. The 5-digit strings only come back for output and display.
+ZIP_DTYPE = np.uint32
+ZIP_CODE_COUNT = 100_000
+# Marks values that don't contain a 5-digit ZIP code
+MISSING_ZIP = np.iinfo(ZIP_DTYPE).max
+ZIP_PATTERN = r"(\d{5})"
+
+
+def parse_zipcodes(values):
+    """
+    Extract the 5-digit ZIP code of each raw value as uint32.
+
+    Values without one get `MISSING_ZIP`. The regex only runs over the
+    distinct values, whose parsed codes are then gathered back per row, so
+    a column with millions of rows but a few hundred spellings is cheap.
+    """
+    codes, uniques = pd.factorize(values)
+    parsed = pd.Series(np.asarray(uniques, dtype=object)).astype(str)
+    parsed = parsed.str.extract(ZIP_PATTERN, expand=False)
+    lookup = np.full(len(parsed) + 1, MISSING_ZIP, dtype=ZIP_DTYPE)
+    found = parsed.notna().to_numpy()
+    lookup[:-1][found] = parsed[found].astype(ZIP_DTYPE).to_numpy()
+    # Missing values are coded -1, which picks the trailing MISSING_ZIP
+    return lookup[codes]
+
+
+def format_zipcodes(zips):
+    """5-digit strings for uint32 ZIP codes, with None for `MISSING_ZIP`."""
+    zips = np.asarray(zips, dtype=ZIP_DTYPE)
+    uniques, inverse = np.unique(zips, return_inverse=True)
+    strings = np.array(
+        [
+            None if zip_code == MISSING_ZIP else f"{zip_code:05d}"
+            for zip_code in uniques
+        ],
+        dtype=object,
+    )
+    return strings[inverse]
+
+
+def zip_categorical(zips, categories=None):
+    """
+    ZIP codes as a pandas Categorical of 5-digit strings.
+
+    Each row only holds a small integer code into the shared categories,
+    which is also how Parquet stores it (dictionary encoding). Passing the
+    full set of `categories` keeps the categories, and the code width, the
+    same across batches; ZIP codes outside it become missing.
+    """
+    zips = np.asarray(zips, dtype=ZIP_DTYPE)
+    if categories is None:
+        categories = zips
+    categories = np.unique(np.asarray(categories, dtype=ZIP_DTYPE))
+    categories = categories[categories != MISSING_ZIP]
+    return pd.Categorical.from_codes(
+        zip_positions(zips, categories), categories=format_zipcodes(categories)
+    )
+
+
+def bincount_zipcodes(zips, weights=None):
+    """
+    Count uint32 ZIP codes into a dense int64 array indexed by the code.
+
+    With `weights`, such as the row counts of already-counted values, each
+    ZIP code adds its weight instead of one.
+    """
+    zips = np.asarray(zips, dtype=ZIP_DTYPE)
+    valid = zips != MISSING_ZIP
+    if weights is not None:
+        weights = np.asarray(weights)[valid]
+    counts = np.bincount(zips[valid], weights=weights, minlength=ZIP_CODE_COUNT)
+    return counts.astype(np.int64)
+
+
+def dense_counts_to_series(counts):
+    """Turn dense per-code counts into a Series indexed by 5-digit ZIP code."""
+    present = np.flatnonzero(counts)
+    return pd.Series(counts[present], index=format_zipcodes(present), dtype="int64")
+
+
+def zip_positions(zips, table_zips):
+    """
+    Row of `table_zips` holding each ZIP code in `zips`, or -1.
+
+    Both are uint32 ZIP code arrays. The lookup goes through a dense table
+    indexed by the code, so matching is array indexing rather than hashing
+    strings.
+    """
+    table_zips = np.asarray(table_zips, dtype=ZIP_DTYPE)
+    zips = np.asarray(zips, dtype=ZIP_DTYPE)
+    positions = np.full(ZIP_CODE_COUNT + 1, -1, dtype=np.int64)
+    valid = table_zips != MISSING_ZIP
+    positions[table_zips[valid]] = np.flatnonzero(valid)
+    # Missing codes look up the trailing -1
+    return positions[np.where(zips == MISSING_ZIP, ZIP_CODE_COUNT, zips)]
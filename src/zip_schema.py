@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+
+ZIPCODES_PATH = "data/geo/nyc_zipcodes.geojson"
+SCHEMA_MANIFEST_PATH = "data/geo/zip_schema.json"
+
+# Field names tried first, then any column whose name hints at a ZIP code
+COMMON_ZIPCODE_FIELDS = [
+    "postalCode",
+    "zipcode",
+    "ZIPCODE",
+    "ZIP",
+    "zip_code",
+    "postal_code",
+]
+ZIPCODE_TERMS = ["zip", "post", "code", "postal"]
+
+
+def file_hash(path, block_size=1 << 20):
+    """SHA-256 of a file's contents, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_schema_manifest(manifest_path=SCHEMA_MANIFEST_PATH):
+    """Load the schema manifest, keyed by file content hash."""
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, "r") as f:
+        return json.load(f)
+
+
+def save_schema_manifest(manifest, manifest_path=SCHEMA_MANIFEST_PATH):
+    """Write the schema manifest."""
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def replace_manifest_entry(manifest, path, digest, schema):
+    """
+    Store a file's schema under its hash, dropping the file's older entries.
+
+    Entries record the path they were written for, so rewriting a file, as
+    every pipeline run does with its outputs, replaces its entry instead of
+    adding one per version. Entries from before paths were recorded are
+    matched by file name.
+    """
+    path = os.path.normpath(path)
+    for key in [
+        key
+        for key, entry in manifest.items()
+        if entry.get("path", entry["file"]) in (path, os.path.basename(path))
+    ]:
+        del manifest[key]
+    manifest[digest] = dict(schema, path=path)
+
+
+def column_dtypes(geo_df):
+    """Dtype names of the attribute columns of a GeoDataFrame."""
+    return {
+        col: str(dtype)
+        for col, dtype in geo_df.dtypes.items()
+        if col != geo_df.geometry.name
+    }
+
+
+def detect_zipcode_field(geo_df, path):
+    """
+    Work out which column of a boundary file holds the ZIP codes.
+
+    Returns `(zip_field, extracted_from)`. `extracted_from` names the column
+    the ZIP codes have to be extracted from when no column holds them as is,
+    and is None otherwise. This is the slow path: it samples values and, as a
+    last resort, re-reads the raw GeoJSON and scans every text column.
+    """
+    # First try exact matches for common field names
+    for field in COMMON_ZIPCODE_FIELDS:
+        if field in geo_df.columns:
+            print(f"Found exact match for ZIP code field: '{field}'")
+            return field, None
+
+    potential_fields = [
+        col
+        for col in geo_df.columns
+        if any(term in col.lower() for term in ZIPCODE_TERMS)
+    ]
+    print(f"Potential ZIP code fields: {potential_fields}")
+
+    # Sample some values to check if they match expected ZIP code format
+    for field in potential_fields:
+        sample_values = geo_df[field].dropna().astype(str).head(5).tolist()
+        print(f"Sample values for '{field}': {sample_values}")
+
+        # Check if values look like ZIP codes (5 digits or 5+4 digits)
+        zip_like = all(
+            (len(val) == 5 and val.isdigit())
+            or (len(val) == 10 and val[5] == "-" and val.replace("-", "").isdigit())
+            for val in sample_values
+            if val
+        )
+        if zip_like:
+            print(f"Selected '{field}' as it contains ZIP code-like values.")
+            return field, None
+
+    # Use the first potential field as a best guess
+    if potential_fields:
+        print(f"Using '{potential_fields[0]}' as the ZIP code field (best guess).")
+        return potential_fields[0], None
+
+    # Look for ZIP code-like properties GeoPandas didn't turn into columns
+    print("Examining GeoJSON properties directly...")
+    with open(path, "r") as f:
+        geojson_data = json.load(f)
+    features = geojson_data.get("features") or [{}]
+    for key, value in features[0].get("properties", {}).items():
+        if isinstance(value, (str, int)) and any(
+            term in key.lower() for term in ZIPCODE_TERMS
+        ):
+            print(f"Selected '{key}' from GeoJSON properties.")
+            return key, None
+
+    # Extract from the first text column where most rows hold a 5-digit value
+    for col in geo_df.columns:
+        if geo_df[col].dtype == "object":
+            extracted = geo_df[col].astype(str).str.extract(r"(\d{5})", expand=False)
+            if extracted.notna().sum() > len(geo_df) * 0.5:
+                print(f"Extracting ZIP codes from the values in '{col}'.")
+                return "extracted_zipcode", col
+
+    return None, None
+
+
+def resolve_zip_schema(path, geo_df=None, manifest_path=SCHEMA_MANIFEST_PATH):
+    """
+    Return the ZIP field and dtypes of a boundary file, detecting them once.
+
+    Results are cached in the manifest under the file's content hash, so
+    unchanged files skip detection entirely and an edited file is detected
+    again. Returns None if no ZIP field can be found.
+    """
+    digest = file_hash(path)
+    manifest = load_schema_manifest(manifest_path)
+    if digest in manifest:
+        return manifest[digest]
+
+    print(f"Resolving the ZIP code field of '{path}'...")
+    if geo_df is None:
+        import geopandas as gpd
+
+        geo_df = gpd.read_file(path)
+    zip_field, extracted_from = detect_zipcode_field(geo_df, path)
+    if zip_field is None:
+        return None
+
+    schema = {
+        "file": os.path.basename(path),
+        "zip_field": zip_field,
+        "extracted_from": extracted_from,
+        "dtypes": column_dtypes(geo_df),
+    }
+    replace_manifest_entry(manifest, path, digest, schema)
+    save_schema_manifest(manifest, manifest_path)
+    return schema
+
+
+def record_zip_schema(path, geo_df, zip_field, manifest_path=SCHEMA_MANIFEST_PATH):
+    """Record the schema of a file written with a known ZIP field."""
+    manifest = load_schema_manifest(manifest_path)
+    schema = {
+        "file": os.path.basename(path),
+        "zip_field": zip_field,
+        "extracted_from": None,
+        "dtypes": column_dtypes(geo_df),
+    }
+    replace_manifest_entry(manifest, path, file_hash(path), schema)
+    save_schema_manifest(manifest, manifest_path)
+
+
+def cached_zipcode_field(path, manifest_path=SCHEMA_MANIFEST_PATH):
+    """The recorded ZIP field of a file, or None if it isn't in the manifest."""
+    schema = load_schema_manifest(manifest_path).get(file_hash(path))
+    return schema["zip_field"] if schema else None
+
+
+def read_zip_boundaries(path, schema, columns=None):
+    """
+    Read a boundary file with its ZIP field as strings.
+
+    With `columns`, only those and the ZIP field (or the column it is
+    extracted from) are read, along with the geometry.
+    """
+    import geopandas as gpd
+
+    source = schema["extracted_from"] or schema["zip_field"]
+    if columns is not None:
+        columns = [source] + [col for col in columns if col != source]
+    boundaries = gpd.read_file(path, columns=columns)
+    if schema["extracted_from"]:
+        boundaries[schema["zip_field"]] = (
+            boundaries[source].astype(str).str.extract(r"(\d{5})", expand=False)
+        )
+    elif schema["dtypes"].get(source) not in ("object", "string", "str"):
+        boundaries[source] = boundaries[source].astype(str)
+    return boundaries